@@ -1,8 +1,15 @@
+import os
+
 from selenium import webdriver
 import requests
 from typing import Optional
 
 
+# Resources inherited from the parent across fork() - kept alive in the child on purpose
+# so their finalizers (which would shut down the parent's browser) never run there
+_inherited_after_fork = []
+
+
 class WebDriverManager:
     # Class variables for the singleton instance and browser driver
     _instance: Optional['WebDriverManager'] = None
@@ -32,6 +39,16 @@ class WebDriverManager:
             self._driver.quit()  # Close the browser properly
             self._driver = None  # Reset the reference for potential reuse
 
+    @classmethod
+    def _reset_after_fork(cls):
+        # FORK SAFETY: A forked worker must not drive the parent's browser
+        # Calling quit() here would close the parent's session, and so would letting the
+        # driver be garbage collected (its Service stops chromedriver when finalized),
+        # so the child parks it and lazily starts its own driver on first access
+        if cls._instance is not None and cls._instance._driver is not None:
+            _inherited_after_fork.append(cls._instance._driver)
+            cls._instance._driver = None
+
 
 class APISession:
     # Class variables for the singleton instance and session
@@ -59,6 +76,22 @@ class APISession:
             self._session.close()
             self._session = None
 
+    @classmethod
+    def _reset_after_fork(cls):
+        # FORK SAFETY: The inherited connection pool shares sockets with the parent
+        # Reusing them from two processes interleaves HTTP traffic, so the child
+        # parks the session (never used or finalized here) and lazily builds a
+        # per-worker pool on first access
+        if cls._instance is not None and cls._instance._session is not None:
+            _inherited_after_fork.append(cls._instance._session)
+            cls._instance._session = None
+
+
+# Register the fork hooks once so forked test workers never share the parent's resources
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=WebDriverManager._reset_after_fork)
+    os.register_at_fork(after_in_child=APISession._reset_after_fork)
+
 
 class UITest:
     def __init__(self):
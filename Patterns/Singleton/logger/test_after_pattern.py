@@ -1,8 +1,16 @@
+import gc
 import json
 import logging
+import os
 import sqlite3
 
 
+# Handles inherited from the parent across fork() - kept alive in the child on purpose
+# Letting them be garbage collected would run their finalizers in the child, e.g. a
+# SQLite close that rolls back and deletes the parent's journal file
+_inherited_after_fork = []
+
+
 class DatabaseManager:
     # Class variables shared by all instances
     _instance = None  # Will store the singleton instance
@@ -41,6 +49,17 @@ class DatabaseManager:
             self._connection.close()
             self._connection = None
 
+    @classmethod
+    def _reset_after_fork(cls):
+        # FORK SAFETY: A forked test worker inherits the parent's SQLite handle
+        # Sharing it between processes corrupts the database file, so the child
+        # parks the inherited handle where it is never used or finalized (the parent
+        # still owns and closes it) and the lazy property opens a fresh per-worker
+        # connection when needed
+        if cls._instance is not None and cls._instance._connection is not None:
+            _inherited_after_fork.append(cls._instance._connection)
+            cls._instance._connection = None
+
     def setup_database(self):
         # Now part of the DatabaseManager class
         # Only runs once when the connection is first established
@@ -62,6 +81,11 @@ class DatabaseManager:
         self._connection.commit()
 
 
+# Register the fork hook once so every forked worker starts with its own connection
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=DatabaseManager._reset_after_fork)
+
+
 class TestLogger:
     # Another Singleton implementation for logger
     _instance = None
@@ -190,4 +214,25 @@ def run_tests():
     DatabaseManager().close()
 
 
+# Fork check - the parent keeps a transaction open while a forked worker uses the database
+# The worker must not touch the parent's handle (the parent's commit would then fail)
+def check_fork_safety():
+    db = DatabaseManager()
+    db.execute_query("INSERT INTO products (name, price) VALUES (?, ?)", ("Fork check", 1.0))
+    pid = os.fork()
+    if pid == 0:
+        # Like a multiprocessing worker: own connection, garbage collection, then os._exit
+        DatabaseManager().execute_query("SELECT COUNT(*) FROM products").fetchone()
+        DatabaseManager().close()
+        gc.collect()
+        os._exit(0)
+    os.waitpid(pid, 0)
+    db.connection.commit()  # Raises "disk I/O error" if the worker rolled back our transaction
+    db.execute_query("DELETE FROM products WHERE name = ?", ("Fork check",))
+    db.close()
+    print("✅ Forked worker left the parent's transaction intact")
+
+
 run_tests()
+if hasattr(os, "fork"):
+    check_fork_safety()
@@ -1,42 +1,162 @@
-from typing import Optional, Dict, Any
+import gzip
+import http.cookiejar
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, BinaryIO, List, Sequence, Union
 import requests
-from requests import Response
+from requests import Response, PreparedRequest, Session
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+from Patterns.builder.requests.response_cache import ResponseCache
 
 
 class RestBuilder:
 
-    def __init__(self, url: str = 'https://catfact.ninja/fact'):
+    METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE')
+    BODY_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+    # One pooled session shared by every builder that doesn't get its own
+    # The pool is large enough for send_many() to keep every connection alive
+    SHARED_POOL_SIZE = 32
+    _shared_session: Optional[Session] = None
+    _shared_session_lock = threading.Lock()
+
+    def __init__(self, url: str = 'https://catfact.ninja/fact', session: Optional[Session] = None):
 
         self.url: str = url
+        self.method: str = 'GET'
         self.params: Optional[Dict[str, Any]] = None
         self.body: Optional[Dict[str, Any]] = None
         self.headers: Optional[Dict[str, str]] = None
+        self.file_body: Optional[str] = None
+        # Bodies at least this large are gzip-compressed (None = never)
+        self.compress_min_size: Optional[int] = None
+        self.compress_level: int = 6
+        # The JSON body serialized (and compressed) once, reused by every build and send
+        self._body_bytes: Optional[bytes] = None
+        self._body_compressed: bool = False
+        self.session: Session = session or RestBuilder.shared_session()
+        self.cache: Optional[ResponseCache] = None
+        # Built once and reused until one of the with_* methods changes the request
+        self._prepared: Optional[PreparedRequest] = None
+        self._send_settings: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def shared_session(cls) -> Session:
+
+        # LAZY INITIALIZATION: the shared connection pool is only created when first needed
+        with cls._shared_session_lock:
+            if cls._shared_session is None:
+                session = requests.Session()
+                # One session for the whole process - cookies set for one builder must never
+                # leak into requests made by another, so the shared jar accepts none
+                session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+                adapter = HTTPAdapter(pool_connections=cls.SHARED_POOL_SIZE, pool_maxsize=cls.SHARED_POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                cls._shared_session = session
+            return cls._shared_session
+
+    def with_method(self, method: str) -> 'RestBuilder':
+
+        method = method.upper()
+        if method not in self.METHODS:
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        self.method = method
+        self._prepared = None
+        return self
 
     def with_body(self, body: Dict[str, Any]) -> 'RestBuilder':
 
         self.body = body
+        self._body_bytes = None
+        self._prepared = None
+        return self
+
+    def with_compression(self, min_size: int = 1024, level: int = 6) -> 'RestBuilder':
+
+        # Send JSON bodies of min_size bytes or more gzip-compressed (Content-Encoding: gzip)
+        self.compress_min_size = min_size
+        self.compress_level = level
+        self._body_bytes = None
+        self._prepared = None
         return self
 
     def with_headers(self, headers: Dict[str, str]) -> 'RestBuilder':
 
         self.headers = headers
+        self._prepared = None
         return self
 
     def with_query_parameters(self, params: Dict[str, Any]) -> 'RestBuilder':
 
         self.params = params
+        self._prepared = None
         return self
 
-    def send_request(self) -> Response:
+    def with_file_body(self, path: str) -> 'RestBuilder':
 
-        try:
-            response = requests.get(
+        # The file is uploaded as the raw request body, read from disk block by block
+        # while sending, so it is never loaded into memory as a whole
+        self.file_body = path
+        self._prepared = None
+        return self
+
+    def with_cache(self, cache: ResponseCache) -> 'RestBuilder':
+
+        # GET responses are served from / revalidated against this HTTP cache
+        self.cache = cache
+        return self
+
+    def build(self) -> PreparedRequest:
+
+        # The prepared request (URL encoding, headers, serialized body) is reused when the
+        # same builder is sent repeatedly. Session cookies are merged at this point, so
+        # cookies set after the first build are only picked up after a with_* call
+        if self._prepared is None:
+            # A body is only sent by methods that carry one - never with GET
+            data = None
+            if self.method in self.BODY_METHODS and self.file_body is None and self.body is not None:
+                data = self._serialized_body()
+            request = requests.Request(
+                method=self.method,
                 url=self.url,
-                json=self.body,
+                data=data,
                 headers=self.headers,
-                params=self.params,
-                timeout=30
+                params=self.params
+            )
+            self._prepared = self.session.prepare_request(request)
+            if data is not None:
+                self._prepared.headers.setdefault('Content-Type', 'application/json')
+                if self._body_compressed:
+                    self._prepared.headers['Content-Encoding'] = 'gzip'
+            self._send_settings = self.session.merge_environment_settings(
+                self._prepared.url, {}, None, None, None
             )
+        return self._prepared
+
+    def _serialized_body(self) -> bytes:
+
+        if self._body_bytes is None:
+            # Same encoding as requests' json= (UTF-8, no NaN), without the extra whitespace
+            body = json.dumps(self.body, separators=(',', ':'), allow_nan=False).encode('utf-8')
+            self._body_compressed = self.compress_min_size is not None and len(body) >= self.compress_min_size
+            if self._body_compressed:
+                body = gzip.compress(body, compresslevel=self.compress_level, mtime=0)
+            self._body_bytes = body
+        return self._body_bytes
+
+    def send_request(self) -> Response:
+
+        try:
+            response = self._send(self.build())
             response.raise_for_status()
             return response
 
@@ -44,9 +164,234 @@ class RestBuilder:
             # Re-raise the exception after logging if needed
             raise
 
+    def stream_to(self, target: Union[str, BinaryIO], chunk_size: int = 1024 * 1024) -> Response:
+
+        # Download the body straight into a file (path or binary file object) chunk by chunk,
+        # so memory use stays the same whatever the payload size
+        try:
+            response = self._send(self.build(), stream=True)
+            with response:
+                response.raise_for_status()
+                if isinstance(target, (str, os.PathLike)):
+                    with open(target, 'wb') as target_file:
+                        self._write_body(response, target_file, chunk_size)
+                else:
+                    self._write_body(response, target, chunk_size)
+            return response
+
+        except requests.RequestException as e:
+            # Re-raise the exception after logging if needed
+            raise
+
+    @staticmethod
+    def _write_body(response: Response, target_file: BinaryIO, chunk_size: int) -> None:
+
+        # Preallocate the file when the final size is known, to avoid fragmented growth
+        length = response.headers.get('Content-Length')
+        encoded = 'Content-Encoding' in response.headers
+        preallocated = False
+        if length and not encoded and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(target_file.fileno(), target_file.tell(), int(length))
+                preallocated = True
+            except (AttributeError, OSError, ValueError):
+                pass  # Not a real file (e.g. BytesIO) or the filesystem doesn't support it
+        try:
+            if encoded:
+                # The raw stream is still compressed - let requests decode it
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    target_file.write(chunk)
+            else:
+                # One buffer reused for the whole download instead of a new bytes per chunk
+                buffer = memoryview(bytearray(chunk_size))
+                while True:
+                    try:
+                        size = response.raw.readinto(buffer)
+                    except ProtocolError as error:
+                        # Same exceptions as iter_content raises for a broken download
+                        raise requests.exceptions.ChunkedEncodingError(error)
+                    except ReadTimeoutError as error:
+                        raise requests.exceptions.ConnectionError(error)
+                    if not size:
+                        break
+                    target_file.write(buffer[:size])
+        finally:
+            if preallocated:
+                # Cut the preallocated zeros if the server sent less than announced or the
+                # download failed halfway - the file then holds only what was received
+                target_file.truncate()
+
+    def _send(self, prepared: PreparedRequest, stream: bool = False) -> Response:
+
+        prepared = prepared.copy()
+        settings = dict(self._send_settings, stream=stream)
+        if self.file_body is not None and self.method in self.BODY_METHODS:
+            with open(self.file_body, 'rb') as body:
+                prepared.body = body
+                prepared.headers['Content-Length'] = str(os.fstat(body.fileno()).st_size)
+                prepared.headers.setdefault('Content-Type', 'application/octet-stream')
+                return self.session.send(prepared, timeout=30, **settings)
+        if self.cache is not None and not stream:
+            return self.cache.send(self.session, prepared, timeout=30, **settings)
+        return self.session.send(prepared, timeout=30, **settings)
+
+    @staticmethod
+    def send_many(builders: Sequence['RestBuilder'], max_concurrency: int = 10) -> List[Union[Response, Exception]]:
+
+        # Send many built requests concurrently over their (shared) pooled sessions
+        # Results come back in input order; a failing request gives its exception
+        # in place of a response instead of aborting the whole batch
+        def send(builder: 'RestBuilder') -> Union[Response, Exception]:
+            try:
+                return builder.send_request()
+            except Exception as error:
+                return error
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            results = list(executor.map(send, builders))
+        elapsed = time.perf_counter() - start
+
+        failed = sum(isinstance(result, Exception) for result in results)
+        print(f"Sent {len(results)} requests in {elapsed:.2f}s "
+              f"({len(results) / elapsed if elapsed else 0:.0f} req/s, {failed} failed)")
+        return results
+
+
+# Benchmark - new connection per request (requests.get) vs the pooled builder session
+# against a local keep-alive server, so only connection handling is measured
+def benchmark_connection_reuse(count: int = 500) -> None:
+
+    connections = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like real API servers
+        disable_nagle_algorithm = True  # Avoid delayed-ACK stalls between header and body writes
+
+        def setup(self):
+            connections.append(1)  # Called once per accepted connection
+            super().setup()
+
+        def do_GET(self):
+            body = b'{"fact": "Cats sleep a lot", "length": 17}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/fact'
+
+    try:
+        start = time.perf_counter()
+        for _ in range(count):
+            requests.get(url, timeout=30).raise_for_status()
+        unpooled = time.perf_counter() - start
+        unpooled_connections, connections[:] = len(connections), []
+
+        builder = RestBuilder(url, session=requests.Session())
+        start = time.perf_counter()
+        for _ in range(count):
+            builder.send_request()
+        pooled = time.perf_counter() - start
+
+        print(f"requests.get: {count} requests, {unpooled_connections} connections, {unpooled:.2f}s")
+        print(f"RestBuilder:  {count} requests, {len(connections)} connections, {pooled:.2f}s")
+    finally:
+        server.shutdown()
+
+
+# Benchmark - peak RSS while streaming large downloads/uploads vs a buffered download
+def benchmark_streaming_transfer(size_mb: int = 200) -> None:
+
+    import resource  # Unix only, so imported just for the benchmark
+
+    block = bytes(1024 * 1024)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(size_mb * len(block)))
+            self.end_headers()
+            for _ in range(size_mb):
+                self.wfile.write(block)
+
+        def do_PUT(self):
+            remaining = int(self.headers['Content-Length'])
+            while remaining:
+                remaining -= len(self.rfile.read(min(remaining, len(block))))
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    def peak_rss_mb() -> float:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ru_maxrss is in KiB on Linux
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/payload'
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'payload.bin')
+        try:
+            # Peak RSS only grows, so the streaming transfers are measured before the buffered one
+            print(f"Peak RSS at start:                 {peak_rss_mb():.0f} MB")
+            RestBuilder(url, session=requests.Session()).stream_to(path)
+            print(f"Peak RSS after {size_mb} MB stream_to:    {peak_rss_mb():.0f} MB")
+            RestBuilder(url, session=requests.Session()).with_method('PUT').with_file_body(path).send_request()
+            print(f"Peak RSS after {size_mb} MB file upload:  {peak_rss_mb():.0f} MB")
+            RestBuilder(url, session=requests.Session()).send_request()
+            print(f"Peak RSS after {size_mb} MB send_request: {peak_rss_mb():.0f} MB")
+        finally:
+            server.shutdown()
+
+
+# Benchmark - CPU time per request: serializing json= on every send vs the builder's cached bytes
+def benchmark_body_serialization(runs: int = 2000) -> None:
+
+    session = requests.Session()
+    url = 'http://127.0.0.1/users'
+    bodies = {
+        'small': {'name': 'Toni'},
+        'large': {'users': [{'id': i, 'name': f'User {i}', 'email': f'user{i}@example.com'} for i in range(5000)]},
+    }
+    for label, body in bodies.items():
+        start = time.process_time()
+        for _ in range(runs):
+            session.prepare_request(requests.Request('POST', url, json=body))
+        per_call = (time.process_time() - start) / runs
+
+        builder = RestBuilder(url, session=session).with_method('POST').with_body(body).with_compression()
+        start = time.process_time()
+        for _ in range(runs):
+            builder.build().copy()
+        cached = (time.process_time() - start) / runs
+
+        size = len(json.dumps(body).encode())
+        print(f"{label} body ({size} bytes, {len(builder.build().body)} sent): "
+              f"json= {per_call * 1e6:.1f}µs, cached {cached * 1e6:.1f}µs per request, "
+              f"{(per_call - cached) * 1e6:.1f}µs saved")
+
 
 # Example usage
 if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark_connection_reuse()
+        benchmark_streaming_transfer()
+        benchmark_body_serialization()
+        sys.exit()
+
     # Define request data
     user_model = {'name': 'Toni'}
     headers = {'accept': "application/json"}
@@ -62,3 +407,26 @@ if __name__ == "__main__":
             .send_request()
     )
     print(response.text)
+
+    # Any HTTP verb, sent over the same pooled session
+    created = (
+        RestBuilder('https://jsonplaceholder.typicode.com/users')
+            .with_method('POST')
+            .with_body(user_model)
+            .with_headers(headers)
+            .send_request()
+    )
+    print(created.status_code, created.json())
+
+    # Reference data cached on disk - repeated runs only revalidate or skip the network entirely
+    reference_cache = ResponseCache('.http_cache')
+    for _ in range(3):
+        fact = RestBuilder().with_cache(reference_cache).send_request()
+        print(getattr(fact, 'from_cache', False), fact.json())
+
+    # Data-driven: many near-identical requests sent concurrently, results in input order
+    results = RestBuilder.send_many(
+        [RestBuilder('https://jsonplaceholder.typicode.com/users').with_query_parameters({'id': user_id})
+         for user_id in range(1, 51)],
+        max_concurrency=10
+    )
@@ -0,0 +1,273 @@
+import email.utils
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+from requests import Response, PreparedRequest, Session
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def parse_http_date(value: Optional[str]) -> Optional[float]:
+
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class ResponseCache:
+
+    # HTTP cache for GET requests following Cache-Control, Expires, ETag and Last-Modified:
+    # - fresh responses are served without touching the network
+    # - stale responses with validators are revalidated with a conditional request (304 = reuse)
+    # Entries live on disk (size-bounded, least recently used evicted first) with the most
+    # recently used small ones also kept in memory as a hot tier
+
+    CACHEABLE_STATUS = (200, 203)
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024,
+                 hot_entries: int = 256, hot_max_body: int = 1024 * 1024):
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hot_entries = hot_entries
+        self.hot_max_body = hot_max_body
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._hot: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # Sizes of the files on disk in LRU order (least recently used first) - every hit moves
+        # its entry to the end, so eviction never has to stat or sort the directory.
+        # Entries left by an earlier run are ordered once by modification time.
+        stats = {name: os.stat(os.path.join(directory, name))
+                 for name in os.listdir(directory) if name.endswith('.entry')}
+        self._sizes: 'OrderedDict[str, int]' = OrderedDict(
+            (name, stats[name].st_size) for name in sorted(stats, key=lambda name: stats[name].st_mtime)
+        )
+        self._total = sum(self._sizes.values())
+
+    def send(self, session: Session, prepared: PreparedRequest, **send_kwargs: Any) -> Response:
+
+        key = hashlib.sha256(prepared.url.encode()).hexdigest()
+        if prepared.method != 'GET' or 'no-store' in parse_cache_control(prepared.headers.get('Cache-Control')):
+            response = session.send(prepared, **send_kwargs)
+            if prepared.method not in ('GET', 'HEAD') and response.status_code < 400:
+                # A successful unsafe request (PUT, POST, PATCH, DELETE...) changed the
+                # resource - the stored response must not be served again (RFC 9111 4.4)
+                self._invalidate(key)
+            return response
+
+        entry = self._load(key)
+        if entry is not None and not self._vary_matches(entry, prepared):
+            entry = None
+
+        if entry is not None and self._is_fresh(entry):
+            self.hits += 1
+            return self._to_response(entry, prepared)
+
+        if entry is not None:
+            # Stale - ask the server whether our copy is still valid
+            if entry['headers'].get('ETag'):
+                prepared.headers['If-None-Match'] = entry['headers']['ETag']
+            if entry['headers'].get('Last-Modified'):
+                prepared.headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+
+        response = session.send(prepared, **send_kwargs)
+
+        if entry is not None and response.status_code == 304:
+            self.revalidations += 1
+            # The 304 carries updated freshness information for the stored response
+            for name in ('Cache-Control', 'Expires', 'Date', 'ETag', 'Last-Modified'):
+                if name in response.headers:
+                    entry['headers'][name] = response.headers[name]
+            # stored_at restarts now, so only the 304's own Age (if any) still applies
+            if 'Age' in response.headers:
+                entry['headers']['Age'] = response.headers['Age']
+            else:
+                entry['headers'].pop('Age', None)
+            entry['stored_at'] = time.time()
+            self._store(key, entry)
+            return self._to_response(entry, prepared)
+
+        self.misses += 1
+        if self._is_storable(response):
+            self._store(key, {
+                'url': response.url,
+                'status': response.status_code,
+                'reason': response.reason,
+                'headers': dict(response.headers),
+                'stored_at': time.time(),
+                'vary': self._vary_values(response, prepared),
+                'body': response.content,
+            })
+        else:
+            # E.g. a revalidation answered by a 200 that can't be stored - the old copy is stale
+            self._invalidate(key)
+        return response
+
+    def _is_storable(self, response: Response) -> bool:
+
+        headers = response.headers
+        directives = parse_cache_control(headers.get('Cache-Control'))
+        if response.status_code not in self.CACHEABLE_STATUS or 'no-store' in directives:
+            return False
+        if headers.get('Vary', '').strip() == '*':
+            return False
+        # Worth keeping only if it can be served fresh or revalidated later
+        return ('max-age' in directives or 'Expires' in headers
+                or 'ETag' in headers or 'Last-Modified' in headers)
+
+    @staticmethod
+    def _freshness_lifetime(headers: Dict[str, str]) -> float:
+
+        directives = parse_cache_control(headers.get('Cache-Control'))
+        if 'max-age' in directives:
+            try:
+                return float(directives['max-age'] or 0)
+            except ValueError:
+                return 0.0
+        date = parse_http_date(headers.get('Date'))
+        expires = parse_http_date(headers.get('Expires'))
+        if 'Expires' in headers:
+            # An invalid Expires (e.g. "0") means already expired
+            return max(0.0, expires - (date or time.time())) if expires else 0.0
+        last_modified = parse_http_date(headers.get('Last-Modified'))
+        if last_modified and date:
+            # Heuristic freshness: 10% of the time since the last modification
+            return max(0.0, (date - last_modified) / 10)
+        return 0.0
+
+    def _is_fresh(self, entry: Dict[str, Any]) -> bool:
+
+        headers = entry['headers']
+        if 'no-cache' in parse_cache_control(headers.get('Cache-Control')):
+            return False
+        try:
+            initial_age = float(headers.get('Age', 0))
+        except ValueError:
+            initial_age = 0.0
+        age = initial_age + time.time() - entry['stored_at']
+        return age < self._freshness_lifetime(headers)
+
+    @staticmethod
+    def _vary_values(response: Response, prepared: PreparedRequest) -> Dict[str, Optional[str]]:
+
+        names = [name.strip() for name in response.headers.get('Vary', '').split(',') if name.strip()]
+        return {name: prepared.headers.get(name) for name in names}
+
+    @staticmethod
+    def _vary_matches(entry: Dict[str, Any], prepared: PreparedRequest) -> bool:
+
+        return all(prepared.headers.get(name) == value for name, value in entry['vary'].items())
+
+    @staticmethod
+    def _to_response(entry: Dict[str, Any], prepared: PreparedRequest) -> Response:
+
+        response = Response()
+        response.status_code = entry['status']
+        response.reason = entry['reason']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = entry['url']
+        response.request = prepared
+        response._content = entry['body']
+        response.from_cache = True
+        return response
+
+    def _path(self, key: str) -> str:
+
+        return os.path.join(self.directory, f'{key}.entry')
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+
+        with self._lock:
+            entry = self._hot.get(key)
+            if entry is not None:
+                self._hot.move_to_end(key)
+                self._sizes.move_to_end(f'{key}.entry')
+                return dict(entry, headers=dict(entry['headers']))
+            if f'{key}.entry' not in self._sizes:
+                return None
+        # Entry file: one JSON metadata line followed by the raw body
+        try:
+            with open(self._path(key), 'rb') as entry_file:
+                entry = json.loads(entry_file.readline())
+                entry['body'] = entry_file.read()
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            if f'{key}.entry' in self._sizes:  # Unless evicted meanwhile
+                self._sizes.move_to_end(f'{key}.entry')
+        self._remember(key, entry)
+        return dict(entry, headers=dict(entry['headers']))
+
+    def _store(self, key: str, entry: Dict[str, Any]) -> None:
+
+        metadata = {name: value for name, value in entry.items() if name != 'body'}
+        data = json.dumps(metadata).encode() + b'\n' + entry['body']
+        name = f'{key}.entry'
+        temporary = self._path(key) + f'.{threading.get_ident()}.tmp'
+        with open(temporary, 'wb') as entry_file:
+            entry_file.write(data)
+        os.replace(temporary, self._path(key))  # Readers never see half-written entries
+
+        with self._lock:
+            self._total += len(data) - self._sizes.get(name, 0)
+            self._sizes[name] = len(data)
+            self._sizes.move_to_end(name)
+            if self._total > self.max_bytes:
+                self._evict()
+        self._remember(key, entry)
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+
+        with self._lock:
+            if len(entry['body']) > self.hot_max_body:
+                self._hot.pop(key, None)
+                return
+            self._hot[key] = entry
+            self._hot.move_to_end(key)
+            while len(self._hot) > self.hot_entries:
+                self._hot.popitem(last=False)
+
+    def _invalidate(self, key: str) -> None:
+
+        name = f'{key}.entry'
+        with self._lock:
+            self._hot.pop(key, None)
+            size = self._sizes.pop(name, None)
+            if size is None:
+                return
+            self._total -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+
+        # Remove least recently used files until the store fits again (called with the lock held)
+        while self._sizes and self._total > self.max_bytes:
+            name, size = self._sizes.popitem(last=False)
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            self._total -= size
+            self._hot.pop(name[:-len('.entry')], None)
@@ -1,3 +1,5 @@
+import copy
+
 from playwright.sync_api import sync_playwright
 
 
@@ -44,13 +46,116 @@ class ElementValidator(Handler):
 
     def handle(self, page):
         # Perform this handler's specific validation logic
-        if not page.locator(self.selector).is_visible():
-            print(f"❌ {self.description} not found")
+        if not self.report(page.locator(self.selector).is_visible()):
             return False  # Return false to indicate validation failure
-        print(f"✅ {self.description} is visible")
         # Call the parent's handle method to continue the chain
         return super().handle(page)
 
+    def report(self, visible):
+        # Print the outcome - also used by ValidationChain when visibility was checked in batch
+        if not visible:
+            print(f"❌ {self.description} not found")
+            return False
+        print(f"✅ {self.description} is visible")
+        return True
+
+
+# Visibility of many selectors in one browser round trip, using Playwright's definition:
+# a non-empty bounding box and no visibility:hidden. null means the script can't decide and the
+# selector has to be checked through page.locator() instead: it is not plain CSS (e.g. text= or
+# xpath=), or nothing matched in the document - Playwright's CSS engine also looks inside open
+# shadow roots, which document.querySelector does not
+VISIBILITY_SCRIPT = """selectors => selectors.map(selector => {
+    let element;
+    try {
+        element = document.querySelector(selector);
+    } catch (error) {
+        return null;
+    }
+    if (!element) return null;
+    const rect = element.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0 && getComputedStyle(element).visibility !== "hidden";
+})"""
+
+
+# Flattened Chain with two modes:
+# - handle(): fail fast, stops at the first failing handler (same result as the linked chain)
+# - validate_all(): runs every handler and collects all failures into one report
+# Playwright's sync page belongs to the thread that created it, so handlers run on this
+# thread in both modes - see ValidationChain in the requests example for the threaded version
+# Consecutive ElementValidators are resolved together with a single page.evaluate call
+class ValidationChain:
+    def __init__(self, first_handler):
+        # Walk the linked handlers once and keep detached copies (without next_handler)
+        self.handlers = []
+        handler = first_handler
+        while handler is not None:
+            detached = copy.copy(handler)
+            detached.next_handler = None
+            self.handlers.append(detached)
+            handler = handler.next_handler
+
+        # Steps are single handlers or lists of consecutive ElementValidators checked in batch
+        # Subclasses that override handle() keep running on their own
+        self.steps = []
+        for handler in self.handlers:
+            if type(handler).handle is not ElementValidator.handle:
+                self.steps.append(handler)
+            elif self.steps and isinstance(self.steps[-1], list):
+                self.steps[-1].append(handler)
+            else:
+                self.steps.append([handler])
+
+    @staticmethod
+    def _visibility(page, validators):
+        visibility = page.evaluate(VISIBILITY_SCRIPT, [validator.selector for validator in validators])
+        return [page.locator(validator.selector).is_visible() if visible is None else visible
+                for validator, visible in zip(validators, visibility)]
+
+    def handle(self, page):
+        for step in self.steps:
+            if isinstance(step, list):
+                for validator, visible in zip(step, self._visibility(page, step)):
+                    if not validator.report(visible):
+                        return False
+            elif not step.handle(page):
+                return False
+        return True
+
+    def validate_all(self, page):
+        failures = []
+        for step in self.steps:
+            group = step if isinstance(step, list) else [step]
+            try:
+                if isinstance(step, list):
+                    for validator, visible in zip(step, self._visibility(page, step)):
+                        if not validator.report(visible):
+                            failures.append((type(validator).__name__, None))
+                elif not step.handle(page):
+                    failures.append((type(step).__name__, None))
+            except Exception as error:
+                failures.extend((type(handler).__name__, error) for handler in group)
+        report = ValidationReport(failures)
+        print(report)
+        return report
+
+
+# Result of ValidationChain.validate_all() - truthy when every handler passed
+class ValidationReport:
+    def __init__(self, failures):
+        self.failures = failures  # (handler name, exception or None) in chain order
+
+    def __bool__(self):
+        return not self.failures
+
+    def __str__(self):
+        if not self.failures:
+            return "🎉 All validations passed"
+        lines = [f"❌ {len(self.failures)} validation(s) failed:"]
+        for name, error in self.failures:
+            lines.append(f"   - {name}" + (f": {error!r}" if error else ""))
+        return "\n".join(lines)
+
 
 # UI Test using Chain of Responsibility pattern
 def test_ui():
@@ -81,8 +186,12 @@ def test_ui():
         else:
             print("❌ UI Test Failed")
 
+        # Collect-all mode - report every missing element in one run instead of the first one
+        ValidationChain(validation_chain).validate_all(page)
+
         browser.close()
 
 
 # Run test
-test_ui()
+if __name__ == "__main__":
+    test_ui()
@@ -1,3 +1,19 @@
+import codecs
+import contextlib
+import copy
+import hashlib
+import io
+import json
+import math
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
 import requests
 
 
@@ -6,6 +22,10 @@ import requests
 # Base Handler - Abstract handler class that defines the chain structure
 # Each handler can process a request and pass it to the next handler in the chain
 class Handler:
+    # Independent handlers don't rely on earlier handlers having passed,
+    # so ValidationChain.validate_all() may run them concurrently
+    independent = False
+
     def __init__(self, next_handler=None):
         # Store reference to the next handler in the chain
         self.next_handler = next_handler
@@ -21,6 +41,8 @@ class Handler:
 
 # Concrete Handler 1: Validates HTTP status code
 class StatusCodeValidator(Handler):
+    independent = True
+
     def handle(self, response):
         # Check if the status code is 200 (OK)
         if response.status_code != 200:
@@ -33,6 +55,8 @@ class StatusCodeValidator(Handler):
 
 # Concrete Handler 2: Validates that the response is valid JSON
 class JsonValidator(Handler):
+    independent = True
+
     def handle(self, response):
         # Attempt to parse the response as JSON
         try:
@@ -45,19 +69,70 @@ class JsonValidator(Handler):
         return super().handle(response)
 
 
+# Field paths: "id", "address.geo.lat", "items[0].id", "items[*].id" ([*] = every element)
+FIELD_PATH = re.compile(r"[^.\[\]]+(\[(\*|-?\d+)\])*(\.[^.\[\]]+(\[(\*|-?\d+)\])*)*")
+PATH_SEGMENT = re.compile(r"([^.\[\]]+)|\[(\*|-?\d+)\]")
+
+
+def compile_field_path(path):
+    # Turn a field path into a function data -> bool (is the field present?)
+    # The path string is parsed only here, never while validating responses
+    if not FIELD_PATH.fullmatch(path):
+        raise ValueError(f"Invalid field path: {path!r}")
+    segments = [("key", key) if key else ("each", None) if index == "*" else ("index", int(index))
+                for key, index in PATH_SEGMENT.findall(path)]
+    return _compile_segments(segments)
+
+
+def _compile_segments(segments):
+    if not segments:
+        return lambda value: True
+    (kind, arg), rest = segments[0], segments[1:]
+
+    if kind == "key":
+        if not rest:
+            return lambda value: isinstance(value, dict) and arg in value
+        check_rest = _compile_segments(rest)
+        return lambda value: isinstance(value, dict) and arg in value and check_rest(value[arg])
+
+    if kind == "index":
+        check_rest = _compile_segments(rest)
+        return lambda value: isinstance(value, list) and -len(value) <= arg < len(value) and check_rest(value[arg])
+
+    if len(rest) == 1 and rest[0][0] == "key":
+        # Fast path for "items[*].id" - one tight loop over the array, no nested calls
+        key = rest[0][1]
+
+        def every_item_has_key(value):
+            if not isinstance(value, list):
+                return False
+            for item in value:
+                if not isinstance(item, dict) or key not in item:
+                    return False
+            return True
+        return every_item_has_key
+
+    check_rest = _compile_segments(rest)
+    return lambda value: isinstance(value, list) and all(map(check_rest, value))
+
+
 # Concrete Handler 3: Validates that the required fields exist in the JSON
 class FieldValidator(Handler):
+    independent = True
+
     def __init__(self, required_fields, next_handler=None):
         super().__init__(next_handler)
         # Store the list of fields that must be present
         self.required_fields = required_fields
+        # Compile every path once, when the chain is built
+        self.field_checks = [(field, compile_field_path(field)) for field in required_fields]
 
     def handle(self, response):
         # Parse the JSON data
         data = response.json()
         # Check if each required field exists
-        for field in self.required_fields:
-            if field not in data:
+        for field, is_present in self.field_checks:
+            if not is_present(data):
                 print(f"❌ Missing field: {field}")
                 return False  # Stop the chain if validation fails
         print("✅ All required fields are present")
@@ -65,6 +140,624 @@ class FieldValidator(Handler):
         return super().handle(response)
 
 
+# Schema validation for a JSON-Schema-like subset:
+# type, enum, required, properties, items, minimum, maximum, minLength, maxLength
+TYPE_CHECKS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool))",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+}
+TYPE_CLASSES = {
+    "object": dict, "array": list, "string": str, "integer": int,
+    "number": (int, float), "boolean": bool, "null": type(None),
+}
+
+compiled_schemas = {}  # schema hash -> compiled validation function, shared by the whole process
+compiled_schemas_lock = threading.Lock()
+
+
+def schema_error(schema, value, path="$"):
+    # Interpreted walk of the schema - returns the first problem found or None
+    # Used to explain failures of the compiled validator and as benchmark baseline
+    types = schema.get("type")
+    if types is not None:
+        types = types if isinstance(types, list) else [types]
+        if not any(isinstance(value, TYPE_CLASSES[t]) and not (isinstance(value, bool) and t in ("integer", "number"))
+                   for t in types):
+            return f"{path} should be {' or '.join(types)}"
+    if "enum" in schema and value not in schema["enum"]:
+        return f"{path} should be one of {schema['enum']}"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if "minimum" in schema and value < schema["minimum"]:
+            return f"{path} should be >= {schema['minimum']}"
+        if "maximum" in schema and value > schema["maximum"]:
+            return f"{path} should be <= {schema['maximum']}"
+    if isinstance(value, str):
+        if "minLength" in schema and len(value) < schema["minLength"]:
+            return f"{path} should have at least {schema['minLength']} characters"
+        if "maxLength" in schema and len(value) > schema["maxLength"]:
+            return f"{path} should have at most {schema['maxLength']} characters"
+    if isinstance(value, dict):
+        for key in schema.get("required", ()):
+            if key not in value:
+                return f"{path}.{key} is required"
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                error = schema_error(subschema, value[key], f"{path}.{key}")
+                if error:
+                    return error
+    if isinstance(value, list) and "items" in schema:
+        for index, item in enumerate(value):
+            error = schema_error(schema["items"], item, f"{path}[{index}]")
+            if error:
+                return error
+    return None
+
+
+class SchemaCompiler:
+    # Generates the source of a function "def validate(v0): ... return True"
+    # with every schema rule inlined as plain Python checks
+    def __init__(self):
+        self.lines = ["def validate(v0):"]
+        self.constants = {}
+        self.variables = 0
+
+    def compile(self, schema):
+        self.emit_checks(schema, "v0", 1)
+        self.lines.append("    return True")
+        namespace = dict(self.constants)
+        exec("\n".join(self.lines), namespace)
+        return namespace["validate"]
+
+    def emit(self, indent, line):
+        self.lines.append("    " * indent + line)
+
+    def new_variable(self):
+        self.variables += 1
+        return f"v{self.variables}"
+
+    def constant(self, prefix, value):
+        # Make value available to the generated function under a fresh name
+        name = f"{prefix}{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    @staticmethod
+    def bound(schema, keyword, types, kind):
+        value = schema[keyword]
+        if not isinstance(value, types) or isinstance(value, bool):
+            raise ValueError(f"Schema {keyword!r} must be {kind}, got {value!r}")
+        return value
+
+    def emit_block(self, indent, header, body):
+        # Emit "header:" followed by body(indent + 1), or nothing when the body is empty
+        self.emit(indent, header)
+        start = len(self.lines)
+        body(indent + 1)
+        if len(self.lines) == start:
+            self.lines.pop()
+
+    def emit_checks(self, schema, v, indent):
+        types = schema.get("type")
+        if types is not None:
+            types = types if isinstance(types, list) else [types]
+            condition = " or ".join(TYPE_CHECKS[t].format(v=v) for t in types)
+            self.emit(indent, f"if not ({condition}): return False")
+        if "enum" in schema:
+            name = self.constant("enum", list(schema["enum"]))
+            self.emit(indent, f"if {v} not in {name}: return False")
+
+        # Bounds are bound as constants, never pasted into the source: a repr like "inf"
+        # (from JSON's Infinity) is not valid Python, and anything else would be executed
+        number = f"isinstance({v}, (int, float)) and not isinstance({v}, bool)"
+        for keyword, operator in (("minimum", "<"), ("maximum", ">")):
+            if keyword in schema:
+                name = self.constant(keyword, self.bound(schema, keyword, (int, float), "a number"))
+                self.emit(indent, f"if {number} and {v} {operator} {name}: return False")
+        for keyword, operator in (("minLength", "<"), ("maxLength", ">")):
+            if keyword in schema:
+                name = self.constant(keyword, self.bound(schema, keyword, int, "an integer"))
+                self.emit(indent, f"if isinstance({v}, str) and len({v}) {operator} {name}: return False")
+
+        def object_checks(inner):
+            for key in schema.get("required", ()):
+                self.emit(inner, f"if {key!r} not in {v}: return False")
+            for key, subschema in schema.get("properties", {}).items():
+                child = self.new_variable()
+
+                def property_checks(body, key=key, subschema=subschema, child=child):
+                    self.emit(body, f"{child} = {v}[{key!r}]")
+                    start = len(self.lines)
+                    self.emit_checks(subschema, child, body)
+                    if len(self.lines) == start:
+                        self.lines.pop()  # No rules for this property - drop the assignment
+                self.emit_block(inner, f"if {key!r} in {v}:", property_checks)
+        if "required" in schema or "properties" in schema:
+            self.emit_block(indent, f"if isinstance({v}, dict):", object_checks)
+
+        if "items" in schema:
+            item = self.new_variable()
+            self.emit_block(indent, f"if isinstance({v}, list):", lambda inner: self.emit_block(
+                inner, f"for {item} in {v}:", lambda body: self.emit_checks(schema["items"], item, body)))
+
+
+def compile_schema(schema):
+    # Compiled validators are cached by schema hash - the cost is paid once per process
+    key = hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+    with compiled_schemas_lock:
+        validate = compiled_schemas.get(key)
+        if validate is None:
+            validate = compiled_schemas[key] = SchemaCompiler().compile(schema)
+    return validate
+
+
+# Concrete Handler 4: Validates the JSON body against a schema
+class SchemaValidator(Handler):
+    independent = True
+
+    def __init__(self, schema, next_handler=None):
+        super().__init__(next_handler)
+        self.schema = schema
+        self.validate = compile_schema(schema)
+
+    def handle(self, response):
+        data = response.json()
+        if not self.validate(data):
+            # Slow path only on failure - walk the schema to explain what is wrong
+            print(f"❌ Schema validation failed: {schema_error(self.schema, data)}")
+            return False
+        print("✅ Response matches the schema")
+        return super().handle(response)
+
+
+# Incremental JSON checker for bodies too large to load in memory
+# Chunks are fed as they arrive; only the container stack, the current key and short
+# literals are buffered, so memory stays bounded whatever the body size.
+# It checks well-formedness and records which dotted object paths ("address.city") exist.
+STRING_SPECIAL = re.compile(r'["\\\x00-\x1f]')
+LITERAL_CHARS = re.compile(r"[0-9a-zA-Z.+-]*")
+LITERAL = re.compile(r"true|false|null|-?(0|[1-9][0-9]*)(\.[0-9]+)?([eE][+-]?[0-9]+)?")
+HEX_DIGITS = set("0123456789abcdefABCDEF")
+
+
+class JsonStreamChecker:
+    def __init__(self, required_fields=()):
+        for field in required_fields:
+            if "[" in field:
+                raise ValueError(f"Streaming mode supports dotted object paths only: {field!r}")
+        self.required = {tuple(field.split(".")) for field in required_fields}
+        self.max_depth = max(map(len, self.required), default=0)  # Deeper keys can't be required
+        self.found = set()  # Only required paths, so huge documents don't grow it
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.stack = []  # [container, current key] for every open object/array
+        self.expect = "value"
+        self.in_string = False
+        self.string_is_key = False
+        self.key_parts = []
+        self.escape = False
+        self.hex_left = 0
+        self.literal = None
+        self.offset = 0
+
+    def feed(self, chunk):
+        text = self.decoder.decode(chunk)
+        self._consume(text)
+        self.offset += len(text)
+
+    def close(self):
+        # Call after the last chunk - raises ValueError if the document is incomplete
+        self._consume(self.decoder.decode(b"", final=True))
+        if self.literal is not None:
+            self._finish_literal()
+        if self.in_string or self.expect != "done":
+            self._fail("Unexpected end of JSON document")
+
+    def missing_fields(self):
+        return [".".join(path) for path in self.required if path not in self.found]
+
+    def _fail(self, message):
+        raise ValueError(f"{message} (around character {self.offset})")
+
+    def _consume(self, text):
+        i, n = 0, len(text)
+        while i < n:
+            if self.in_string:
+                i = self._consume_string(text, i)
+                continue
+            if self.literal is not None:
+                match = LITERAL_CHARS.match(text, i)
+                self.literal += match.group()
+                i = match.end()
+                if i < n:
+                    self._finish_literal()  # The delimiter itself is handled below
+                continue
+
+            c = text[i]
+            if c in " \t\n\r":
+                i += 1
+                continue
+            expect = self.expect
+            if expect in ("value", "value_or_end"):
+                if c == "]" and expect == "value_or_end":
+                    self._close("[")
+                elif c == "{":
+                    self.stack.append(["{", None])
+                    self.expect = "key_or_end"
+                elif c == "[":
+                    self.stack.append(["[", None])
+                    self.expect = "value_or_end"
+                elif c == '"':
+                    self.in_string, self.string_is_key = True, False
+                elif c in "-0123456789tfn":
+                    self.literal = ""
+                    continue  # The literal loop consumes this character
+                else:
+                    self._fail(f"Unexpected character {c!r}")
+            elif expect in ("key", "key_or_end"):
+                if c == '"':
+                    self.in_string, self.string_is_key = True, True
+                elif c == "}" and expect == "key_or_end":
+                    self._close("{")
+                else:
+                    self._fail(f"Expected an object key, got {c!r}")
+            elif expect == "colon":
+                if c != ":":
+                    self._fail(f"Expected ':', got {c!r}")
+                self.expect = "value"
+            elif expect == "comma_or_end":
+                if c == ",":
+                    self.expect = "key" if self.stack[-1][0] == "{" else "value"
+                elif c == "}":
+                    self._close("{")
+                elif c == "]":
+                    self._close("[")
+                else:
+                    self._fail(f"Expected ',' or a closing bracket, got {c!r}")
+            else:
+                self._fail(f"Unexpected data after the JSON document: {c!r}")
+            i += 1
+
+    def _consume_string(self, text, i):
+        n = len(text)
+        while i < n:
+            if self.escape or self.hex_left:
+                c = text[i]
+                if self.hex_left:
+                    if c not in HEX_DIGITS:
+                        self._fail("Invalid \\u escape")
+                    self.hex_left -= 1
+                elif c == "u":
+                    self.hex_left = 4
+                elif c not in '"\\/bfnrt':
+                    self._fail(f"Invalid escape \\{c}")
+                self.escape = False
+                if self.string_is_key:
+                    self.key_parts.append(c)
+                i += 1
+                continue
+            # Jump straight to the next quote, backslash or control character
+            match = STRING_SPECIAL.search(text, i)
+            end = match.start() if match else n
+            if self.string_is_key:
+                self.key_parts.append(text[i:end])
+            if match is None:
+                return n
+            c = text[end]
+            if c == '"':
+                self.in_string = False
+                if self.string_is_key:
+                    self._finish_key()
+                else:
+                    self._value_done()
+                return end + 1
+            if c != "\\":
+                self._fail("Control character in string")
+            if self.string_is_key:
+                self.key_parts.append(c)
+            self.escape = True
+            i = end + 1
+        return i
+
+    def _finish_key(self):
+        key = json.loads('"' + "".join(self.key_parts) + '"')
+        self.key_parts = []
+        self.stack[-1][1] = key
+        # Paths are tracked through nested objects only (arrays end the dotted path)
+        if len(self.stack) <= self.max_depth and all(container == "{" for container, _ in self.stack):
+            path = tuple(current_key for _, current_key in self.stack)
+            if path in self.required:
+                self.found.add(path)
+        self.expect = "colon"
+
+    def _finish_literal(self):
+        if not LITERAL.fullmatch(self.literal):
+            self._fail(f"Invalid literal {self.literal!r}")
+        self.literal = None
+        self._value_done()
+
+    def _close(self, container):
+        if self.stack.pop()[0] != container:
+            self._fail("Mismatched closing bracket")
+        self._value_done()
+
+    def _value_done(self):
+        self.expect = "comma_or_end" if self.stack else "done"
+
+
+# Concrete Handler 5: Streaming replacement for JsonValidator + FieldValidator
+# Consumes response.iter_content() in a single pass with bounded memory - send the request
+# with stream=True and put it after StatusCodeValidator (which never reads the body)
+class StreamingBodyValidator(Handler):
+    def __init__(self, required_fields=(), chunk_size=64 * 1024, next_handler=None):
+        super().__init__(next_handler)
+        self.required_fields = required_fields
+        self.chunk_size = chunk_size
+        JsonStreamChecker(required_fields)  # Reject unsupported paths when the chain is built
+
+    def handle(self, response):
+        checker = JsonStreamChecker(self.required_fields)
+        try:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                checker.feed(chunk)
+            checker.close()
+        except ValueError as error:  # UnicodeDecodeError is a ValueError too
+            print(f"❌ Response is not valid JSON: {error}")
+            return False
+        print("✅ Response is valid JSON")
+        missing = checker.missing_fields()
+        if missing:
+            print(f"❌ Missing field: {missing[0]}")
+            return False
+        print("✅ All required fields are present")
+        return super().handle(response)
+
+
+# Concrete Handler 6: Fails the chain on performance regressions
+# Checks response.elapsed against a budget, and the rolling p95 of the endpoint
+# (method + path) over the last `window` responses. Per-phase timings are checked too when
+# the transport provides them as response.timings, e.g. {"connect": 0.01, "ttfb": 0.2}
+class LatencyValidator(Handler):
+    independent = True
+
+    def __init__(self, budget, p95_budget=None, window=100, min_samples=20,
+                 phase_budgets=None, endpoint=None, path_patterns=(), next_handler=None):
+        super().__init__(next_handler)
+        self.budget = budget  # seconds
+        self.p95_budget = budget if p95_budget is None else p95_budget
+        self.window = window
+        self.min_samples = min_samples  # The p95 is only enforced once the window has enough samples
+        self.phase_budgets = phase_budgets or {}
+        # How responses are grouped into rolling windows - by default "METHOD /path", so
+        # parameterised paths need either a fixed endpoint key (str), a callable(response)
+        # returning the key, or path_patterns: regexes whose pattern replaces a matching path
+        # (e.g. r"/users/\d+" puts /users/1 and /users/2 in one window)
+        self.endpoint = endpoint
+        self.path_patterns = [re.compile(pattern) for pattern in path_patterns]
+        self.samples = {}  # endpoint -> deque of recent latencies
+        self._lock = threading.Lock()  # Compiled chains are shared between threads
+
+    def handle(self, response):
+        latency = response.elapsed.total_seconds()
+        endpoint = self._endpoint(response)
+
+        with self._lock:
+            samples = self.samples.get(endpoint)
+            if samples is None:
+                samples = self.samples[endpoint] = deque(maxlen=self.window)
+            samples.append(latency)
+            ordered = sorted(samples)
+        p95 = ordered[max(0, math.ceil(len(ordered) * 0.95) - 1)]  # Nearest rank
+
+        if latency > self.budget:
+            print(f"❌ {endpoint} took {latency * 1000:.0f}ms (budget {self.budget * 1000:.0f}ms)")
+            return False
+        if len(ordered) >= self.min_samples and p95 > self.p95_budget:
+            print(f"❌ {endpoint} rolling p95 is {p95 * 1000:.0f}ms (budget {self.p95_budget * 1000:.0f}ms)")
+            return False
+        timings = getattr(response, "timings", None) or {}
+        for phase, phase_budget in self.phase_budgets.items():
+            if phase in timings and timings[phase] > phase_budget:
+                print(f"❌ {endpoint} {phase} took {timings[phase] * 1000:.0f}ms "
+                      f"(budget {phase_budget * 1000:.0f}ms)")
+                return False
+        print(f"✅ {endpoint} answered in {latency * 1000:.0f}ms (p95 {p95 * 1000:.0f}ms)")
+        return super().handle(response)
+
+    def _endpoint(self, response):
+        if callable(self.endpoint):
+            return self.endpoint(response)
+        if self.endpoint is not None:
+            return self.endpoint
+        request = getattr(response, "request", None)
+        path = urlsplit(response.url).path
+        for pattern in self.path_patterns:
+            if pattern.fullmatch(path):
+                path = pattern.pattern
+                break
+        return f"{getattr(request, 'method', 'GET')} {path}"
+
+
+# Shared Response Context - passed down the chain instead of the raw response
+# It behaves like the response (status_code, headers, ... are delegated) but json() parses
+# the body only once, so every handler after the first one gets the cached result.
+# Handlers can also share derived values through the values dict.
+class ResponseContext:
+    _NOT_PARSED = object()
+
+    def __init__(self, response):
+        self.response = response
+        self.values = {}
+        self.parse_count = 0
+        self._json = self._NOT_PARSED
+        self._json_error = None
+        self._lock = threading.Lock()  # Handlers may read the context from several threads
+
+    def json(self):
+        if self._json is self._NOT_PARSED and self._json_error is None:
+            with self._lock:
+                if self._json is self._NOT_PARSED and self._json_error is None:
+                    self.parse_count += 1
+                    try:
+                        self._json = self.response.json()
+                    except ValueError as error:
+                        # Remember the failure too - an invalid body is not parsed again either
+                        self._json_error = error
+        if self._json_error is not None:
+            raise self._json_error
+        return self._json
+
+    def __getattr__(self, name):
+        # Everything else (status_code, headers, elapsed, text...) comes from the response
+        return getattr(self.response, name)
+
+
+# Flattened Chain - runs the same handlers in a loop instead of through recursion
+# The linked handlers are walked once and each one is detached (shallow copy without
+# next_handler), so an existing subclass's handle() only performs its own check and its
+# super().handle() call returns True right away. Long chains no longer grow the stack.
+class ValidationChain:
+    def __init__(self, first_handler, max_workers=8):
+        handlers = []
+        handler = first_handler
+        while handler is not None:
+            detached = copy.copy(handler)
+            detached.next_handler = None
+            handlers.append(detached)
+            handler = handler.next_handler
+        # A tuple - a built chain never changes, so it can be shared between tests and threads
+        self.handlers = tuple(handlers)
+        # validate_all() reuses one executor for the chain's lifetime (created on first use)
+        # Threads only pay off when at least two handlers can run side by side, and the calling
+        # thread runs the first independent handler itself instead of waiting idle
+        self.max_workers = max_workers
+        self.offloaded = tuple(handler for handler in self.handlers if handler.independent)[1:]
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def handle(self, response):
+        # Every handler shares one context, so the body is decoded once per response
+        if not isinstance(response, ResponseContext):
+            response = ResponseContext(response)
+        # Short-circuit on the first failing handler, like the linked chain does
+        for handler in self.handlers:
+            if not handler.handle(response):
+                return False
+        return True
+
+    def validate_all(self, response):
+        # Collect-all mode: every handler runs and all failures end up in one report
+        # Independent handlers run concurrently, the others in chain order on this thread
+        if not isinstance(response, ResponseContext):
+            response = ResponseContext(response)
+
+        def run(handler):
+            try:
+                return handler.handle(response), None
+            except Exception as error:
+                # e.g. FieldValidator on a body that is not JSON
+                return False, error
+
+        if self.offloaded:
+            executor = self._get_executor()
+            futures = {handler: executor.submit(run, handler) for handler in self.offloaded}
+            outcomes = [futures[handler].result() if handler in futures else run(handler)
+                        for handler in self.handlers]
+        else:
+            outcomes = [run(handler) for handler in self.handlers]
+
+        report = ValidationReport([
+            (type(handler).__name__, error)
+            for handler, (passed, error) in zip(self.handlers, outcomes) if not passed
+        ])
+        print(report)
+        return report
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def close(self):
+        # Stop the worker threads - only needed for chains that are thrown away early
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+# Result of ValidationChain.validate_all() - truthy when every handler passed
+class ValidationReport:
+    def __init__(self, failures):
+        self.failures = failures  # (handler name, exception or None) in chain order
+
+    def __bool__(self):
+        return not self.failures
+
+    def __str__(self):
+        if not self.failures:
+            return "🎉 All validations passed"
+        lines = [f"❌ {len(self.failures)} validation(s) failed:"]
+        for name, error in self.failures:
+            lines.append(f"   - {name}" + (f": {error!r}" if error else ""))
+        return "\n".join(lines)
+
+
+# Declarative Chains - a chain described as data instead of nested constructors
+# A spec is a list of steps (or the same as a JSON string), e.g.
+#   [{"handler": "StatusCodeValidator"},
+#    {"handler": "FieldValidator", "args": {"required_fields": ["id", "name"]}}]
+# Compiled chains are cached by spec hash and named chains live in a registry,
+# so hundreds of tests share the same compiled validators
+HANDLER_TYPES = {handler_type.__name__: handler_type for handler_type in (
+    StatusCodeValidator, JsonValidator, FieldValidator, SchemaValidator, StreamingBodyValidator,
+    LatencyValidator,
+)}
+
+compiled_chains = {}  # spec hash -> ValidationChain
+named_chains = {}  # name -> ValidationChain
+chains_lock = threading.Lock()
+
+
+def compile_chain(spec):
+    if isinstance(spec, str):
+        spec = json.loads(spec)
+    key = hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+    with chains_lock:
+        chain = compiled_chains.get(key)
+        if chain is None:
+            # Build the linked handlers from the last step to the first, then flatten them once
+            handler = None
+            for step in reversed(spec):
+                handler_type = HANDLER_TYPES.get(step["handler"])
+                if handler_type is None:
+                    raise ValueError(f"Unknown handler: {step['handler']!r}")
+                # Own copies of the arguments - the caller may reuse or change its spec after
+                # compiling, which must not alter the cached chain stored under the old key
+                handler = handler_type(**copy.deepcopy(step.get("args", {})), next_handler=handler)
+            chain = compiled_chains[key] = ValidationChain(handler)
+    return chain
+
+
+def register_chain(name, spec):
+    chain = compile_chain(spec)
+    with chains_lock:
+        named_chains[name] = chain
+    return chain
+
+
+def get_chain(name):
+    try:
+        return named_chains[name]
+    except KeyError:
+        raise ValueError(f"No chain registered as {name!r}") from None
+
+
 # API Test using Chain of Responsibility pattern
 def test_api():
     # Make the API request
@@ -78,9 +771,12 @@ def test_api():
 
     # Define the validation chain by nesting handlers
     # Each handler gets the next one as a constructor parameter
-    validator_chain = StatusCodeValidator(
-        JsonValidator(
-            FieldValidator(["id", "name", "email"])
+    # ValidationChain flattens the nested handlers once and runs them in a loop
+    validator_chain = ValidationChain(
+        StatusCodeValidator(
+            JsonValidator(
+                FieldValidator(["id", "name", "email"])
+            )
         )
     )
 
@@ -90,6 +786,148 @@ def test_api():
     else:
         print("❌ API Test Failed")
 
+    # The same chain, declared once as data and looked up by name in every test
+    register_chain("user", [
+        {"handler": "StatusCodeValidator"},
+        {"handler": "JsonValidator"},
+        {"handler": "FieldValidator", "args": {"required_fields": ["id", "name", "email"]}},
+        {"handler": "LatencyValidator", "args": {"budget": 2.0, "p95_budget": 0.8}},
+    ])
+    if get_chain("user").handle(response):
+        print("🎉 API Test Passed with the registered chain")
+
+
+# Benchmark - linked (recursive) chain vs flattened ValidationChain
+# Uses silent handlers and a fake response so only the chain overhead is measured
+def benchmark_chain(handler_counts=(10, 100, 1000), responses=1_000_000):
+    class PassThrough(Handler):
+        def handle(self, response):
+            return super().handle(response)
+
+    response = object()
+    for count in handler_counts:
+        linked = None
+        for _ in range(count):
+            linked = PassThrough(linked)
+        flattened = ValidationChain(linked)
+
+        for name, chain in (("linked", linked), ("flattened", flattened)):
+            start = time.perf_counter()
+            try:
+                for _ in range(responses):
+                    chain.handle(response)
+            except RecursionError:
+                print(f"⏱️ {count:>5} handlers, {name:>9}: RecursionError")
+                continue
+            elapsed = time.perf_counter() - start
+            print(f"⏱️ {count:>5} handlers, {name:>9}: {elapsed:.2f}s "
+                  f"({elapsed / responses * 1e6:.2f}µs per response)")
+
+
+# Benchmark - raw response vs shared ResponseContext on a multi-megabyte JSON body
+def benchmark_shared_context(items=50_000, runs=20):
+    class LargeResponse:
+        status_code = 200
+
+        def __init__(self, body):
+            self.content = body
+            self.parse_count = 0
+
+        def json(self):
+            self.parse_count += 1
+            return json.loads(self.content)
+
+    body = json.dumps({"id": 1, "name": "Leanne", "email": "leanne@example.com",
+                       "items": [{"id": i, "value": "x" * 50} for i in range(items)]})
+    handlers = StatusCodeValidator(JsonValidator(FieldValidator(["id", "name", "email"])))
+
+    for name, chain, wrap in (("raw response", handlers, lambda r: r),
+                              ("shared context", ValidationChain(handlers), ResponseContext)):
+        response = LargeResponse(body)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # Keep handler messages out of the timing
+            for _ in range(runs):
+                chain.handle(wrap(response))
+        elapsed = time.perf_counter() - start
+        print(f"⏱️ {len(body) / 1e6:.1f} MB body, {name:>14}: {response.parse_count / runs:.0f} "
+              f"parses per response, {elapsed / runs * 1000:.1f}ms per response")
+
+
+# Benchmark - compiled SchemaValidator vs interpreted schema walk on a large payload
+def benchmark_schema(items=100_000, runs=5):
+    schema = {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "required": ["id", "name", "email", "address"],
+            "properties": {
+                "id": {"type": "integer", "minimum": 1},
+                "name": {"type": "string", "minLength": 1},
+                "email": {"type": "string"},
+                "active": {"type": "boolean"},
+                "role": {"enum": ["admin", "user"]},
+                "address": {
+                    "type": "object",
+                    "required": ["city"],
+                    "properties": {"city": {"type": "string"}, "zip": {"type": ["string", "null"]}},
+                },
+            },
+        },
+    }
+    payload = [{"id": i + 1, "name": "Leanne", "email": "leanne@example.com", "active": True,
+                "role": "user", "address": {"city": "Gwenborough", "zip": None}} for i in range(items)]
+
+    start = time.perf_counter()
+    validate = compile_schema(schema)
+    compile_time = time.perf_counter() - start
+
+    for name, check in (("interpreted", lambda: schema_error(schema, payload) is None),
+                        ("compiled", lambda: validate(payload))):
+        start = time.perf_counter()
+        for _ in range(runs):
+            assert check()
+        elapsed = (time.perf_counter() - start) / runs
+        print(f"⏱️ {items} items, {name:>11}: {elapsed * 1000:.1f}ms per response")
+    print(f"⏱️ One-off compile time: {compile_time * 1000:.2f}ms")
+
+
+# Benchmark - peak memory of streaming validation vs loading the whole body
+def benchmark_streaming(items=200_000):
+    def chunks():
+        # The body is generated on the fly, so the benchmark itself holds no full copy
+        yield b'{"id": 1, "name": "export", "email": "export@example.com", "items": ['
+        for i in range(items):
+            yield (b"," if i else b"") + json.dumps({"id": i, "value": "x" * 200}).encode()
+        yield b"]}"
+
+    class StreamedResponse:
+        status_code = 200
+
+        def iter_content(self, chunk_size=1):
+            return chunks()
+
+        def json(self):
+            return json.loads(b"".join(chunks()))
+
+    size = sum(len(chunk) for chunk in chunks())
+    for name, chain in (("loaded", StatusCodeValidator(JsonValidator(FieldValidator(["id", "name", "email"])))),
+                        ("streaming", StatusCodeValidator(StreamingBodyValidator(["id", "name", "email"])))):
+        tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert ValidationChain(chain).handle(StreamedResponse())
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"⏱️ {size / 1e6:.0f} MB body, {name:>9}: peak {peak / 1e6:.1f} MB, {elapsed:.2f}s")
+
 
 # Run test
-test_api()
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark_chain()
+        benchmark_shared_context()
+        benchmark_schema()
+        benchmark_streaming()
+    else:
+        test_api()
@@ -1,14 +1,29 @@
+import asyncio
+import inspect
+import json
+import os
+import time
+from collections import deque
+
+from playwright.async_api import async_playwright
 from playwright.sync_api import sync_playwright
 
+from Patterns.command.metrics import CommandMetrics
+
 
 # Command Pattern Implementation for E-commerce Testing
 
 # Base Command - Abstract class that defines the command interface
 # Each command must implement execute() and undo() methods
 class Command:
+    # __slots__ keeps every command small when long runs keep many of them in history
+    __slots__ = ()
+
     def execute(self):
         # This method will be overridden by concrete commands
         # to perform their specific actions
+        # Commands return what the page call returned - on an async page that is a
+        # coroutine, awaited by AsyncCartInvoker
         raise NotImplementedError("Subclasses must implement execute()")
 
     def undo(self):
@@ -16,9 +31,16 @@ class Command:
         # to reverse their specific actions
         raise NotImplementedError("Subclasses must implement undo()")
 
+    def as_script(self):
+        # JavaScript statement equivalent to execute(), used by MacroCommand
+        # None means the command needs real input events and must run step by step
+        return None
+
 
 # Concrete Command 1: Handles adding items to the shopping cart
 class AddToCart(Command):
+    __slots__ = ("page", "item_id")
+
     def __init__(self, page, item_id):
         # Store references needed to execute this command
         self.page = page
@@ -27,16 +49,23 @@ class AddToCart(Command):
     def execute(self):
         # Implementation of adding an item to the cart
         print(f"🛒 Adding item {self.item_id} to cart")
-        self.page.click(f"#item-{self.item_id} .add-to-cart")
+        return self.page.click(f"#item-{self.item_id} .add-to-cart")
+
+    def as_script(self):
+        # A plain button click has no hover/keyboard semantics, so a DOM click is equivalent
+        selector = json.dumps(f"#item-{self.item_id} .add-to-cart")
+        return f"clickOrFail({selector});"
 
     def undo(self):
         # Implementation to reverse the action (remove the item)
         print(f"❌ Removing item {self.item_id} from cart")
-        self.page.click(f"#item-{self.item_id} .remove-from-cart")
+        return self.page.click(f"#item-{self.item_id} .remove-from-cart")
 
 
 # Concrete Command 2: Handles the checkout process
 class Checkout(Command):
+    __slots__ = ("page",)
+
     def __init__(self, page):
         # Store reference to the page
         self.page = page
@@ -44,35 +73,215 @@ class Checkout(Command):
     def execute(self):
         # Implementation of proceeding to checkout
         print("💳 Proceeding to checkout")
-        self.page.click("#checkout")
+        return self.page.click("#checkout")
 
     def undo(self):
         # Implementation to reverse the checkout action
         print("⏪ Cancelling checkout (going back)")
-        self.page.go_back()
+        return self.page.go_back()
+
+
+# Composite Command: runs a sequence of cart commands with as few browser round trips as possible
+# Consecutive scriptable commands are compiled into a single page.evaluate call,
+# commands that need real input events (e.g. Checkout navigates) fall back to execute()
+class MacroCommand(Command):
+    __slots__ = ("page", "commands", "completed")
+
+    # element.click() skips Playwright's actionability checks, so the script repeats the
+    # important ones and fails loudly instead of clicking a hidden, disabled or covered button.
+    # It returns how many clicks succeeded, so a failure halfway still reports the done ones.
+    SCRIPT_TEMPLATE = """() => {
+        let done = 0;
+        const clickOrFail = (selector) => {
+            const element = document.querySelector(selector);
+            if (!element) throw new Error(`Element not found: ${selector}`);
+            const style = getComputedStyle(element);
+            if (!element.getClientRects().length || style.visibility === "hidden")
+                throw new Error(`Element not visible: ${selector}`);
+            if (element.disabled || element.closest("fieldset:disabled")
+                    || element.getAttribute("aria-disabled") === "true")
+                throw new Error(`Element disabled: ${selector}`);
+            element.scrollIntoView({block: "center"});
+            const box = element.getBoundingClientRect();
+            const target = document.elementFromPoint(box.left + box.width / 2, box.top + box.height / 2);
+            if (!element.contains(target)) throw new Error(`Element covered by another element: ${selector}`);
+            element.click();
+            done++;
+        };
+        try {
+            %s
+        } catch (error) {
+            return {done, error: error.message};
+        }
+        return {done, error: null};
+    }"""
+
+    def __init__(self, page, commands):
+        self.page = page
+        self.commands = list(commands)
+        self.completed = []  # Commands that ran, in order - also filled when a later one fails
+
+    def execute(self):
+        self.completed = []
+        batch = []
+        for command in self.commands:
+            script = command.as_script()
+            if script is None:
+                # Flush what we have so far to keep the original order, then run the step
+                self._run_batch(batch)
+                batch = []
+                command.execute()
+                self.completed.append(command)
+            else:
+                batch.append(command)
+        self._run_batch(batch)
+
+    def _run_batch(self, commands):
+        if not commands:
+            return
+        print(f"⚡ Running {len(commands)} cart commands in one browser round trip")
+        scripts = "\n            ".join(command.as_script() for command in commands)
+        result = self.page.evaluate(self.SCRIPT_TEMPLATE % scripts)
+        self.completed.extend(commands[:result["done"]])
+        if result["error"] is not None:
+            raise RuntimeError(f"Cart command {len(self.completed) + 1} of the macro failed: {result['error']}")
+
+    def undo(self):
+        # Undo is still per command, in reverse order - only what actually ran
+        for command in reversed(self.completed):
+            command.undo()
 
 
 # Command Invoker - Responsible for executing commands and tracking history
 # This class manages the command execution flow and enables undo functionality
 class CartInvoker:
-    def __init__(self):
+    def __init__(self, max_history=None):
         # Command history enables undo functionality
-        self.history = []
+        # With max_history the history is a ring buffer - the oldest commands are dropped
+        self.history = deque(maxlen=max_history)
+        # Latency, count and error aggregates per command class
+        self.metrics = CommandMetrics()
 
     def execute_command(self, command):
         # Execute the command and store it in history
-        command.execute()
-        self.history.append(command)
+        if isinstance(command, MacroCommand):
+            try:
+                self.metrics.run(command, "execute")
+            finally:
+                # Keep the individual commands so undo_last_command still undoes one step -
+                # including the ones that ran before a failure, so they can still be undone
+                self.history.extend(command.completed)
+        else:
+            self.metrics.run(command, "execute")
+            self.history.append(command)
 
     def undo_last_command(self):
         # Retrieve and undo the last command from history
         if self.history:
             command = self.history.pop()
-            command.undo()
+            self.metrics.run(command, "undo")
         else:
             print("⚠️ No actions to undo")
 
 
+# Concurrency limit for parallel scenarios - one worker per CPU,
+# but never more browser contexts than the available memory can hold
+def default_concurrency(memory_per_context_mb=200):
+    cpus = os.cpu_count() or 1
+    try:
+        available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        # sysconf is not available on every platform - fall back to the CPU count
+        return cpus
+    return max(1, min(cpus, available // (memory_per_context_mb * 1024 * 1024)))
+
+
+# Async Invoker - the same commands and history on Playwright's async API
+# Commands return the page call, which is awaited here, so timings cover the whole action
+class AsyncCartInvoker(CartInvoker):
+    async def execute_command(self, command):
+        if isinstance(command, MacroCommand):
+            raise TypeError("MacroCommand needs a sync page - run it with CartInvoker")
+        await self._run(command, "execute")
+        self.history.append(command)
+
+    async def undo_last_command(self):
+        if self.history:
+            await self._run(self.history.pop(), "undo")
+        else:
+            print("⚠️ No actions to undo")
+
+    async def _run(self, command, operation):
+        start = time.perf_counter_ns()
+        failed = True
+        try:
+            result = getattr(command, operation)()
+            if inspect.isawaitable(result):
+                await result
+            failed = False
+        finally:
+            self.metrics.record(type(command).__name__, operation, time.perf_counter_ns() - start, failed)
+
+
+# Parallel Scenario Runner - many independent cart scenarios, each with its own AsyncCartInvoker
+# One browser on one event loop; every scenario gets a fresh lightweight browser context
+# (isolated cookies and storage) and a semaphore caps how many contexts are open at once
+class ParallelCartRunner:
+    def __init__(self, url, max_workers=None, headless=True):
+        self.url = url
+        self.max_workers = max_workers or default_concurrency()
+        self.headless = headless
+
+    def run(self, scenarios):
+        # scenarios: async callables taking (page, cart_invoker)
+        # Returns one entry per scenario, in input order: None on success, the exception otherwise
+        start = time.perf_counter()
+        results = asyncio.run(self._run_all(scenarios))
+        elapsed = time.perf_counter() - start
+
+        failed = sum(result is not None for result in results)
+        print(f"🧪 {len(scenarios)} scenarios, up to {self.max_workers} at a time, in {elapsed:.2f}s "
+              f"({len(scenarios) / elapsed if elapsed else 0:.1f} scenarios/s, {failed} failed)")
+        return results
+
+    async def _run_all(self, scenarios):
+        not_run = object()
+        results = [not_run] * len(scenarios)
+        limit = asyncio.Semaphore(self.max_workers)
+
+        async def run_scenario(browser, index, scenario):
+            async with limit:
+                context = None
+                try:
+                    context = await browser.new_context()
+                    page = await context.new_page()
+                    await page.goto(self.url)
+                    await scenario(page, AsyncCartInvoker())
+                    results[index] = None
+                except Exception as error:
+                    results[index] = error
+                finally:
+                    if context is not None:
+                        await context.close()
+
+        startup_error = None
+        try:
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=self.headless)
+                try:
+                    await asyncio.gather(*(run_scenario(browser, index, scenario)
+                                           for index, scenario in enumerate(scenarios)))
+                finally:
+                    await browser.close()
+        except Exception as error:
+            # Playwright or the browser failed - scenarios that never ran fail with that error
+            startup_error = error
+        return [
+            (startup_error or RuntimeError("Scenario did not run")) if result is not_run else result
+            for result in results
+        ]
+
+
 # BENEFITS OF COMMAND PATTERN:
 # 1. Encapsulation - Each action is encapsulated in its own class
 # 2. Extensibility - New commands can be added without changing existing code
@@ -81,24 +290,38 @@ class CartInvoker:
 # 5. Composability - Commands can be combined and sequenced flexibly
 
 # Running the test with Command Pattern
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=False)
-    page = browser.new_page()
+if __name__ == "__main__":
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=False)
+        page = browser.new_page()
+
+        # Navigate to shopping site
+        page.goto("https://example.com/shop")
+
+        # Create invoker to manage commands
+        cart = CartInvoker()
+
+        # Execute commands through the invoker
+        cart.execute_command(AddToCart(page, 1))  # Add item 1
+        cart.execute_command(AddToCart(page, 2))  # Add item 2
+
+        # Demonstrate undo functionality
+        cart.undo_last_command()  # Undo the last command (remove item 2)
 
-    # Navigate to shopping site
-    page.goto("https://example.com/shop")
+        # Continue with checkout
+        cart.execute_command(Checkout(page))
 
-    # Create invoker to manage commands
-    cart = CartInvoker()
+        # Fill a large cart in a single round trip - Checkout still runs as a real click
+        page.goto("https://example.com/shop")
+        cart.execute_command(MacroCommand(page, [AddToCart(page, item_id) for item_id in range(1, 51)] + [Checkout(page)]))
 
-    # Execute commands through the invoker
-    cart.execute_command(AddToCart(page, 1))  # Add item 1
-    cart.execute_command(AddToCart(page, 2))  # Add item 2
+        print(cart.metrics.to_json())
 
-    # Demonstrate undo functionality
-    cart.undo_last_command()  # Undo the last command (remove item 2)
+        browser.close()
 
-    # Continue with checkout
-    cart.execute_command(Checkout(page))
+    # Run many independent cart scenarios in parallel, headless, one context each
+    async def add_two_items(page, cart):
+        await cart.execute_command(AddToCart(page, 1))
+        await cart.execute_command(AddToCart(page, 2))
 
-    browser.close()
+    ParallelCartRunner("https://example.com/shop").run([add_two_items] * 20)
@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+
+
+# Command Metrics - shared by the API and cart invokers
+# Every execute/undo goes through run(), which times it with perf_counter_ns and
+# aggregates count, errors and a latency histogram per (command class, operation)
+
+# Histogram bucket upper bounds in seconds (the last, implicit bucket is +Inf)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_BUCKETS_NS = tuple(int(bound * 1e9) for bound in BUCKETS)
+
+
+class _Series:
+    __slots__ = ("count", "errors", "total_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+
+class CommandMetrics:
+    def __init__(self):
+        self._series = {}  # (command class name, operation) -> _Series
+        self._lock = threading.Lock()  # Invokers may run commands from several threads
+
+    def run(self, command, operation):
+        # Call command.execute() / command.undo() and record how long it took
+        start = time.perf_counter_ns()
+        failed = True
+        try:
+            result = getattr(command, operation)()
+            failed = False
+            return result
+        finally:
+            self.record(type(command).__name__, operation, time.perf_counter_ns() - start, failed)
+
+    def record(self, command_name, operation, duration_ns, failed=False):
+        with self._lock:
+            series = self._series.get((command_name, operation))
+            if series is None:
+                series = self._series[(command_name, operation)] = _Series()
+            series.count += 1
+            series.errors += failed
+            series.total_ns += duration_ns
+            series.buckets[bisect_left(_BUCKETS_NS, duration_ns)] += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                f"{command_name}.{operation}": {
+                    "count": series.count,
+                    "errors": series.errors,
+                    "total_seconds": series.total_ns / 1e9,
+                    "buckets": dict(zip([*map(str, BUCKETS), "+Inf"], series.buckets)),
+                }
+                for (command_name, operation), series in sorted(self._series.items())
+            }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self):
+        # Prometheus text exposition format (histogram buckets are cumulative)
+        lines = [
+            "# HELP command_duration_seconds Time spent in command execute/undo",
+            "# TYPE command_duration_seconds histogram",
+        ]
+        errors = [
+            "# HELP command_errors_total Command execute/undo calls that raised",
+            "# TYPE command_errors_total counter",
+        ]
+        with self._lock:
+            for (command_name, operation), series in sorted(self._series.items()):
+                labels = f'command="{command_name}",operation="{operation}"'
+                cumulative = 0
+                for bound, hits in zip([*map(str, BUCKETS), "+Inf"], series.buckets):
+                    cumulative += hits
+                    lines.append(f'command_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"command_duration_seconds_sum{{{labels}}} {series.total_ns / 1e9}")
+                lines.append(f"command_duration_seconds_count{{{labels}}} {series.count}")
+                errors.append(f"command_errors_total{{{labels}}} {series.errors}")
+        return "\n".join(lines + errors) + "\n"
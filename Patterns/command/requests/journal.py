@@ -0,0 +1,104 @@
+import json
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Append-only Command Journal
+# Every sent command is stored as a compact binary record so a test run can be
+# replayed later as a load test. Record layout:
+#   <int64 timestamp_ns><uint32 payload length><payload: JSON [command type, args]>
+RECORD_HEADER = struct.Struct("<qI")
+
+
+class CommandJournal:
+    def __init__(self, path, buffer_size=1024 * 1024):
+        # A large write buffer keeps journaling off the hot path -
+        # records are only written to disk when the buffer fills or on flush()/close()
+        self._file = open(path, "ab", buffering=buffer_size)
+        self._lock = threading.Lock()  # Commands may be executed from several threads
+
+    def append(self, command):
+        payload = json.dumps(
+            [type(command).__name__, command.journal_args()], separators=(",", ":")
+        ).encode()
+        record = RECORD_HEADER.pack(time.time_ns(), len(payload)) + payload
+        with self._lock:
+            self._file.write(record)
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_journal(path):
+    # Stream the records back one by one - the journal is never loaded in memory as a whole
+    with open(path, "rb") as journal_file:
+        while True:
+            header = journal_file.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            timestamp_ns, length = RECORD_HEADER.unpack(header)
+            payload = journal_file.read(length)
+            if len(payload) < length:
+                # Last record cut short (crash or unflushed buffer) - replay what was complete
+                return
+            command_type, args = json.loads(payload)
+            yield timestamp_ns, command_type, args
+
+
+# Journal Replayer - turns a recorded run into load against a target
+# command_types maps the recorded type name to the command class,
+# each command is rebuilt as command_class(session, url, *args)
+class JournalReplayer:
+    def __init__(self, command_types, session, url, max_workers=16):
+        self.command_types = command_types
+        self.session = session
+        self.url = url
+        self.max_workers = max_workers
+
+    def replay(self, path, speed=1.0):
+        # speed=1.0 keeps the original pacing, 2.0 replays twice as fast,
+        # None sends every command as fast as the workers allow
+        sent = 0
+        failures = []
+        # Bound the queued work so streaming a huge journal never buffers it all in memory
+        in_flight = threading.BoundedSemaphore(self.max_workers * 2)
+
+        def on_done(future):
+            in_flight.release()
+            # Only failures are kept, so replaying millions of records stays light
+            if future.exception() is not None:
+                failures.append(future.exception())
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            first_timestamp = None
+            for timestamp_ns, command_type, args in read_journal(path):
+                if speed is not None:
+                    if first_timestamp is None:
+                        first_timestamp = timestamp_ns
+                    # Open loop: wait for the scheduled time, not for previous commands
+                    due = (timestamp_ns - first_timestamp) / 1e9 / speed
+                    delay = due - (time.perf_counter() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+                command = self.command_types[command_type](self.session, self.url, *args)
+                in_flight.acquire()
+                executor.submit(command.execute).add_done_callback(on_done)
+                sent += 1
+        elapsed = time.perf_counter() - start
+        print(f"🔁 Replayed {sent} commands in {elapsed:.2f}s "
+              f"({sent / elapsed if elapsed else 0:.0f}/s, {len(failures)} failed)")
+        return sent, failures, elapsed
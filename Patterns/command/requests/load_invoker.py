@@ -0,0 +1,86 @@
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def http_error(result):
+    # Default error check - commands return their response, and 4xx/5xx don't raise
+    return getattr(result, "status_code", 0) >= 400
+
+
+# Load Invoker - the Command pattern as a capacity-testing tool
+# Commands are picked from a weighted mix of factories and issued at a fixed arrival rate
+# (open loop): a slow response never delays the next send. Latency is measured from the
+# time a command was *scheduled*, so queueing behind slow commands is counted as well
+# and the results don't suffer from coordinated omission.
+class LoadInvoker:
+    def __init__(self, mix, rate, max_workers=32, seed=None, is_error=http_error):
+        # mix: list of (weight, factory) pairs, e.g.
+        #   [(70, lambda: GetUser(...)), (20, lambda: UpdateUser(...)), (10, lambda: CreateUser(...))]
+        # rate: target arrival rate in commands per second
+        # is_error: called with what execute() returned, True counts the command as failed
+        self.weights = [weight for weight, _ in mix]
+        self.factories = [factory for _, factory in mix]
+        self.rate = rate
+        self.max_workers = max_workers
+        self.is_error = is_error
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._latencies = []
+        self._errors = 0
+
+    def run(self, duration):
+        # Issue rate * duration commands and return the report once all of them completed
+        self._latencies, self._errors = [], 0
+        total = int(self.rate * duration)
+        interval = 1 / self.rate
+        factories = self._random.choices(self.factories, weights=self.weights, k=total)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for index, factory in enumerate(factories):
+                scheduled = start + index * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._execute, factory(), scheduled)
+            # The achieved rate is about sending - waiting for the last responses doesn't count
+            send_elapsed = time.perf_counter() - start
+        return self._report(total, send_elapsed)
+
+    def _execute(self, command, scheduled):
+        try:
+            failed = bool(self.is_error(command.execute()))
+        except Exception:
+            failed = True
+        latency = time.perf_counter() - scheduled
+        with self._lock:
+            self._latencies.append(latency)
+            self._errors += failed
+
+    def _report(self, total, send_elapsed):
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            # Nearest-rank percentile: the smallest value with at least p% of samples at or below it
+            if not latencies:
+                return 0.0
+            return latencies[max(0, math.ceil(len(latencies) * p / 100) - 1)]
+
+        report = {
+            "sent": total,
+            "errors": self._errors,
+            "target_rate": self.rate,
+            "achieved_rate": (total - 1) / send_elapsed if total > 1 and send_elapsed else 0.0,
+            "p50": percentile(50),
+            "p90": percentile(90),
+            "p99": percentile(99),
+            "p99.9": percentile(99.9),
+            "max": latencies[-1] if latencies else 0.0,
+        }
+        print(f"📈 {total} commands at {report['achieved_rate']:.1f}/s (target {self.rate}/s), "
+              f"{self._errors} errors - p50 {report['p50'] * 1000:.1f}ms, "
+              f"p99 {report['p99'] * 1000:.1f}ms, max {report['max'] * 1000:.1f}ms")
+        return report
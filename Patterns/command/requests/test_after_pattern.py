@@ -1,11 +1,34 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import requests
 
+from Patterns.command.metrics import CommandMetrics
+from Patterns.command.requests.journal import CommandJournal, JournalReplayer
+from Patterns.command.requests.load_invoker import LoadInvoker
+
 
 # Command Pattern Implementation for API Testing
 
 # Base Command - Abstract class that defines the command interface
 # Each API operation is encapsulated as a command with execute and undo capabilities
 class Command:
+    # __slots__ keeps every command small - long soak runs keep millions of them alive
+    __slots__ = ()
+
     def execute(self):
         # This method will perform the actual API operation
         raise NotImplementedError("Subclasses must implement execute()")
@@ -14,9 +37,20 @@ class Command:
         # This method will reverse the API operation if possible
         raise NotImplementedError("Subclasses must implement undo()")
 
+    def journal_args(self):
+        # Arguments (besides session and url) needed to rebuild the command when replaying
+        raise NotImplementedError("Subclasses must implement journal_args()")
+
+    def coalesce_key(self):
+        # Read-only commands return a key so identical requests in flight can be shared
+        # Commands that change data keep None and are never coalesced
+        return None
+
 
 # Concrete Command 1: Create User API Operation
 class CreateUser(Command):
+    __slots__ = ("session", "url", "user_data", "user_id")
+
     def __init__(self, session, url, user_data):
         # Store all necessary information to perform the operation
         self.session = session
@@ -32,6 +66,7 @@ class CreateUser(Command):
             # Store the ID for potential undo operation
             self.user_id = response.json().get("id")
         print(f"✅ Created: {response.status_code}, {response.json()}")
+        return response
 
     def undo(self):
         # Undo the creation by deleting the user
@@ -40,57 +75,96 @@ class CreateUser(Command):
             response = self.session.delete(f"{self.url}/{self.user_id}")
             print(f"🗑️ Deleted: {response.status_code}")
 
+    def journal_args(self):
+        return [self.user_data]
+
 
 # Concrete Command 2: Get User API Operation
 class GetUser(Command):
+    __slots__ = ("session", "url", "user_id", "snapshot_cache")
+
     def __init__(self, session, url, user_id):
         self.session = session
         self.url = url
         self.user_id = user_id
+        self.snapshot_cache = None  # Set by the invoker to share responses with UpdateUser
 
     def execute(self):
         # Perform the get user API call
         print(f"🔍 Fetching details for user {self.user_id}...")
         response = self.session.get(f"{self.url}/{self.user_id}")
+        if self.snapshot_cache is not None:
+            # Remember the body and its ETag so a later update can revalidate cheaply
+            self.snapshot_cache.store(f"{self.url}/{self.user_id}", response)
         print(f"📄 Response: {response.status_code}, {response.json()}")
+        return response
 
     def undo(self):
         # Get operation doesn't modify data, so undo is not needed
         # However, we still implement the method as required by the interface
         pass
 
+    def journal_args(self):
+        return [self.user_id]
+
+    def coalesce_key(self):
+        # The session is part of the key - different sessions may carry different credentials
+        return GetUser, id(self.session), self.url, self.user_id
+
 
 # Concrete Command 3: Update User API Operation
 class UpdateUser(Command):
+    __slots__ = ("session", "url", "user_id", "new_data", "old_data", "snapshot_cache")
+
     def __init__(self, session, url, user_id, new_data):
         self.session = session
         self.url = url
         self.user_id = user_id
         self.new_data = new_data
         self.old_data = None  # Will store the previous user data for undo
+        self.snapshot_cache = None  # Set by the invoker to avoid a full GET before the PUT
 
     def execute(self):
         # First, get the current data to enable undoing
         print(f"📝 Updating user {self.user_id}...")
-        old_response = self.session.get(f"{self.url}/{self.user_id}")
-        if old_response.status_code == 200:
-            # Store the current state for potential undo
-            self.old_data = old_response.json()
+        resource_url = f"{self.url}/{self.user_id}"
+        if self.snapshot_cache is not None:
+            # Conditional GET - a 304 reuses the body cached from an earlier response
+            self.old_data = self.snapshot_cache.fetch(self.session, resource_url)
+        else:
+            old_response = self.session.get(resource_url)
+            if old_response.status_code == 200:
+                # Store the current state for potential undo
+                self.old_data = old_response.json()
 
         # Perform the update operation
-        response = self.session.put(f"{self.url}/{self.user_id}", json=self.new_data)
+        response = self.session.put(resource_url, json=self.new_data)
+        if self.snapshot_cache is not None:
+            # Cache the new representation (or forget the stale one if no ETag came back)
+            self.snapshot_cache.store(resource_url, response)
         print(f"✅ Updated: {response.status_code}, {response.json()}")
+        return response
 
     def undo(self):
         # Revert the user to its previous state
-        if self.old_data:
+        old_data = self.old_data
+        if isinstance(old_data, DiskSnapshot):
+            # The snapshot was spilled to disk by the invoker - load it back only now
+            # (and keep it, the file is gone and a failed undo may be retried)
+            old_data = self.old_data = old_data.load()
+        if old_data:
             print(f"↩️ Undo: Reverting user {self.user_id} to previous state...")
-            response = self.session.put(f"{self.url}/{self.user_id}", json=self.old_data)
+            response = self.session.put(f"{self.url}/{self.user_id}", json=old_data)
             print(f"🔄 Reverted: {response.status_code}, {response.json()}")
 
+    def journal_args(self):
+        return [self.user_id, self.new_data]
+
 
 # Concrete Command 4: Delete User API Operation
 class DeleteUser(Command):
+    __slots__ = ("session", "url", "user_id")
+
     def __init__(self, session, url, user_id):
         self.session = session
         self.url = url
@@ -101,32 +175,380 @@ class DeleteUser(Command):
         print(f"🗑️ Deleting user {self.user_id}...")
         response = self.session.delete(f"{self.url}/{self.user_id}")
         print(f"✅ Deleted: {response.status_code}")
+        return response
 
     def undo(self):
         # To properly undo a delete, we would need to store the user data before deletion
         # This implementation is simplified and doesn't include full undo capability
         pass
 
+    def journal_args(self):
+        return [self.user_id]
+
+
+# Undo snapshot stored on disk instead of in memory
+# Only a file path stays in the command until the snapshot is needed again
+class DiskSnapshot:
+    __slots__ = ("path",)
+
+    def __init__(self, data, directory):
+        fd, self.path = tempfile.mkstemp(suffix=".json", dir=directory)
+        with os.fdopen(fd, "w") as snapshot_file:
+            json.dump(data, snapshot_file)
+
+    def load(self):
+        # Read the snapshot back and remove the file - an undo happens only once
+        with open(self.path) as snapshot_file:
+            data = json.load(snapshot_file)
+        os.remove(self.path)
+        return data
+
+    def discard(self):
+        # Remove the file of a snapshot that will never be undone
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+# Per-resource snapshot cache validated with ETag / If-None-Match
+# Entries are only kept when the server sent an ETag, otherwise they could not be revalidated
+class SnapshotCache:
+    def __init__(self, max_entries=1024):
+        # Least recently used resources are forgotten first, so long runs stay bounded
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # resource url -> (etag, decoded body)
+        self._lock = threading.Lock()  # Commands may run concurrently in execute_batch
+
+    def store(self, url, response):
+        etag = response.headers.get("ETag")
+        with self._lock:
+            if response.status_code == 200 and etag:
+                self._entries[url] = (etag, response.json())
+                self._entries.move_to_end(url)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.pop(url, None)
+
+    def fetch(self, session, url):
+        # Return the current body of the resource, revalidating the cached copy if present
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+        headers = {"If-None-Match": entry[0]} if entry else None
+        response = session.get(url, headers=headers)
+        if response.status_code == 304 and entry:
+            return entry[1]
+        if response.status_code == 200:
+            self.store(url, response)
+            return response.json()
+        return None
+
+
+# Raised by undo_all with every failure, not just the first one
+class UndoError(Exception):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} undo(s) failed: " + "; ".join(map(repr, errors)))
+        self.errors = errors
+
 
 # Command Invoker - Manages command execution and history
 class APIInvoker:
-    def __init__(self):
+    def __init__(self, max_history=None, spill_after=None, spill_dir=None, journal=None,
+                 coalesce_window=0.0, snapshot_entries=1024):
         # Command history for undo functionality
-        self.history = []
+        # With max_history the history is a ring buffer - the oldest commands are dropped
+        self.history = deque(maxlen=max_history)
+        # Undo snapshots older than the last spill_after commands are moved to disk
+        self.spill_after = spill_after
+        self.spill_dir = spill_dir
+        self._remove_spill_dir = None  # Set when the invoker creates its own spill directory
+        # Responses shared between commands so UpdateUser can revalidate instead of re-fetching
+        self.snapshots = SnapshotCache(max_entries=snapshot_entries)
+        # Optional CommandJournal - every sent command is recorded for later replay
+        self.journal = journal
+        # Latency, count and error aggregates per command class (see metrics.to_prometheus())
+        self.metrics = CommandMetrics()
+        # Single-flight: identical read commands running at the same time share one request
+        # coalesce_window additionally reuses a finished response for that many seconds
+        self.coalesce_window = coalesce_window
+        self._in_flight = {}  # coalesce key -> Future of the leader's response
+        self._recent = {}  # coalesce key -> (completion time, response), oldest first
+        self._coalesce_lock = threading.Lock()
 
     def execute_command(self, command):
         # Execute the command and add to history
-        command.execute()
+        # The result (e.g. the response of a coalesced read) is returned, never kept on the
+        # command, so the history doesn't hold on to response bodies
+        self._prepare(command)
+        result = self._execute(command)
+        self._record(command)
+        return result
+
+    def _execute(self, command):
+        key = command.coalesce_key()
+        if key is None:
+            try:
+                return self.metrics.run(command, "execute")
+            finally:
+                # A write may change what a recently served read returned
+                if self._recent:
+                    with self._coalesce_lock:
+                        self._recent.clear()
+
+        with self._coalesce_lock:
+            self._prune_recent()
+            recent = self._recent.get(key)
+            if recent:
+                return recent[1]
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+
+        if not leader:
+            # Wait for the identical request already in flight (re-raises its error)
+            return future.result()
+
+        try:
+            response = self.metrics.run(command, "execute")
+        except BaseException as error:
+            with self._coalesce_lock:
+                del self._in_flight[key]
+            future.set_exception(error)
+            raise
+        with self._coalesce_lock:
+            del self._in_flight[key]
+            if self.coalesce_window:
+                self._recent.pop(key, None)  # Re-inserted at the end to keep completion order
+                self._recent[key] = (time.monotonic(), response)
+                self._prune_recent()
+        future.set_result(response)
+        return response
+
+    def _prune_recent(self):
+        # Forget responses older than the window (called with the coalesce lock held)
+        # Entries are in completion order, so the expired ones are always at the front
+        now = time.monotonic()
+        while self._recent:
+            key, (completed, _) = next(iter(self._recent.items()))
+            if now - completed <= self.coalesce_window:
+                break
+            del self._recent[key]
+
+    def _prepare(self, command):
+        # Hand the shared snapshot cache to commands that can use it
+        if getattr(command, "snapshot_cache", False) is None:
+            command.snapshot_cache = self.snapshots
+        if self.journal is not None:
+            # Journaled right before the send, so replay pacing follows the original send times
+            self.journal.append(command)
+
+    def _record(self, command):
+        if self.history.maxlen is not None and len(self.history) == self.history.maxlen:
+            # The oldest command is about to fall out of the ring buffer - so is its snapshot on disk
+            evicted = getattr(self.history[0], "old_data", None)
+            if isinstance(evicted, DiskSnapshot):
+                evicted.discard()
         self.history.append(command)
+        if self.spill_after is None or len(self.history) <= self.spill_after:
+            return
+        # Spill the snapshot of the command that just left the in-memory window
+        older = self.history[-self.spill_after - 1]
+        old_data = getattr(older, "old_data", None)
+        if old_data and not isinstance(old_data, DiskSnapshot):
+            if self.spill_dir is None:
+                self.spill_dir = tempfile.mkdtemp(prefix="undo_snapshots_")
+                # Our own directory is removed with the invoker (or at interpreter exit)
+                self._remove_spill_dir = weakref.finalize(self, shutil.rmtree, self.spill_dir, True)
+            older.old_data = DiskSnapshot(old_data, self.spill_dir)
+
+    def close(self):
+        # Delete the spill directory created by this invoker, with the snapshots left in it
+        if self._remove_spill_dir is not None:
+            self._remove_spill_dir()
+
+    def execute_batch(self, commands, max_workers=4, dependencies=None):
+        # Execute independent commands concurrently on a thread pool
+        # dependencies maps a command to the commands that must finish before it starts
+        # e.g. {update_cmd: [create_cmd]} runs UpdateUser only after CreateUser
+        # Returns the results in the order of commands (None for commands that never ran)
+        dependencies = dependencies or {}
+        pending = {command: set(dependencies.get(command, ())) for command in commands}
+        for required in pending.values():
+            if not required <= pending.keys():
+                raise ValueError("Dependencies must be part of the same batch")
+
+        error = None
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            # After a failure nothing new is submitted, but running commands are still awaited
+            while (pending and error is None) or running:
+                if error is None:
+                    # Submit every command whose dependencies have all completed
+                    for command in [cmd for cmd, required in pending.items() if not required]:
+                        del pending[command]
+                        self._prepare(command)
+                        running[executor.submit(self._execute, command)] = command
+                    if not running:
+                        raise ValueError("Circular dependency between batch commands")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    command = running.pop(future)
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                        continue
+                    # History is recorded in completion order, on the caller's thread,
+                    # so every command that succeeded can still be undone
+                    self._record(command)
+                    results[command] = future.result()
+                    for required in pending.values():
+                        required.discard(command)
+        if error is not None:
+            raise error  # The first failure from a worker thread
+        return [results.get(command) for command in commands]
 
     def undo_last_command(self):
         # Undo the last executed command
         if self.history:
             command = self.history.pop()
-            command.undo()
+            self.metrics.run(command, "undo")
         else:
             print("⚠️ No actions to undo")
 
+    def undo_all(self, max_workers=8):
+        # Roll back the whole history concurrently
+        # Commands touching the same resource are undone in reverse order on one worker,
+        # commands on different resources are independent and run in parallel
+        if not self.history:
+            print("⚠️ No actions to undo")
+            return 0.0
+
+        per_resource = {}
+        for index, command in reversed(list(enumerate(self.history))):
+            resource = (getattr(command, "url", None), getattr(command, "user_id", None))
+            per_resource.setdefault(resource, []).append((index, command))
+
+        def undo_in_order(commands):
+            # Stop at the first failure - older commands on the same resource depend on it
+            for position, (_, command) in enumerate(commands):
+                try:
+                    self.metrics.run(command, "undo")
+                except Exception as error:
+                    return error, commands[position:]
+            return None, []
+
+        start = time.perf_counter()
+        errors, not_undone = [], []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for future in [executor.submit(undo_in_order, commands) for commands in per_resource.values()]:
+                error, remaining = future.result()
+                if error is not None:
+                    errors.append(error)
+                    not_undone.extend(remaining)
+        # Commands that could not be undone stay in the history (in execution order) for a retry
+        self.history.clear()
+        self.history.extend(command for _, command in sorted(not_undone, key=lambda item: item[0]))
+        elapsed = time.perf_counter() - start
+        print(f"⏪ Rolled back {len(per_resource) - len(errors)} of {len(per_resource)} resources in {elapsed:.2f}s")
+        if errors:
+            raise UndoError(errors)
+        return elapsed
+
+
+# Memory benchmark - how much the history costs after a long soak run
+# Commands are built offline with a realistic undo snapshot, no requests are sent
+def measure_history_memory(commands=100_000, **invoker_options):
+    snapshot = {"id": 1, "name": "John Doe", "email": "john@example.com",
+                "address": {"street": "Main St", "city": "Springfield"}}
+    tracemalloc.start()
+    invoker = APIInvoker(**invoker_options)
+    for user_id in range(commands):
+        command = UpdateUser(None, "https://jsonplaceholder.typicode.com/users", user_id, {"name": "x"})
+        command.old_data = dict(snapshot)
+        invoker._record(command)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"📊 {commands} commands {invoker_options or '(unbounded)'}: "
+          f"current {current / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB")
+    return current, peak
+
+
+# Benchmark - UpdateUser against a local server that answers conditional GETs with 304
+# With the snapshot cache the pre-update GET costs a 304 instead of the whole resource
+def benchmark_etag_revalidation(updates=200, bio_kb=64):
+    user = {"id": 1, "name": "John Doe", "bio": "x" * (bio_kb * 1024)}
+    stats = {"full": 0, "not_modified": 0, "bytes": 0}
+    lock = threading.Lock()
+
+    def representation():
+        body = json.dumps(user).encode()
+        return body, '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like real API servers
+        disable_nagle_algorithm = True  # Avoid delayed-ACK stalls between header and body writes
+
+        def do_GET(self):
+            with lock:
+                body, etag = representation()
+                if self.headers.get("If-None-Match") == etag:
+                    stats["not_modified"] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                stats["full"] += 1
+                stats["bytes"] += len(body)
+            self._send_json(body, etag)
+
+        def do_PUT(self):
+            changes = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                user.update(changes)
+                body, etag = representation()
+            self._send_json(body, etag)
+
+        def _send_json(self, body, etag):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/users"
+
+    try:
+        for label, snapshot_cache in (("plain GET", None), ("ETag cache", SnapshotCache())):
+            session = requests.Session()
+            stats.update(full=0, not_modified=0, bytes=0)
+            commands = []
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # Keep the per-command output quiet
+                for index in range(updates):
+                    command = UpdateUser(session, url, 1, {"name": f"John {index % 2}"})
+                    command.snapshot_cache = snapshot_cache
+                    command.execute()
+                    commands.append(command)
+            elapsed = time.perf_counter() - start
+            # A 304 hands back the body cached from the previous PUT - same undo snapshot either way
+            assert all(command.old_data["bio"] == user["bio"] for command in commands)
+            print(f"{label}: {updates} updates in {elapsed:.2f}s, {stats['full']} full GETs, "
+                  f"{stats['not_modified']} x 304, {stats['bytes'] / 1024:.0f} KiB of GET bodies")
+    finally:
+        server.shutdown()
+
 
 # BENEFITS OF COMMAND PATTERN IN API TESTING:
 # 1. Encapsulation - Each API operation is encapsulated in its own class
@@ -137,6 +559,13 @@ class APIInvoker:
 
 # Running API tests with Command Pattern
 if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        # Compare unbounded history against a bounded ring buffer
+        measure_history_memory()
+        measure_history_memory(max_history=1_000)
+        benchmark_etag_revalidation()
+        sys.exit()
+
     # Create a session for all requests
     session = requests.Session()
     base_url = "https://jsonplaceholder.typicode.com/users"
@@ -157,6 +586,35 @@ if __name__ == "__main__":
     # Demonstrate undo functionality - revert the update
     invoker.undo_last_command()
 
+    # Which command types dominate the run?
+    print(invoker.metrics.to_prometheus())
+
+    # Record commands into a journal and replay them as load at twice the original speed
+    with CommandJournal("commands.journal") as journal:
+        recording_invoker = APIInvoker(journal=journal)
+        recording_invoker.execute_command(GetUser(session, base_url, 1))
+        recording_invoker.execute_command(GetUser(session, base_url, 2))
+    command_types = {cls.__name__: cls for cls in (CreateUser, GetUser, UpdateUser, DeleteUser)}
+    JournalReplayer(command_types, session, base_url, max_workers=8).replay("commands.journal", speed=2.0)
+
+    # Capacity test: 70% reads, 20% updates, 10% creations at 20 commands per second
+    load = LoadInvoker([
+        (70, lambda: GetUser(session, base_url, 1)),
+        (20, lambda: UpdateUser(session, base_url, 1, {"name": "Load Test"})),
+        (10, lambda: CreateUser(session, base_url, {"name": "Load Test"})),
+    ], rate=20)
+    load.run(duration=5)
+
     # Delete user command
     delete_cmd = DeleteUser(session, base_url, 1)
     invoker.execute_command(delete_cmd)
+
+    # Run a batch concurrently - the update waits for the first creation to finish
+    first_create = CreateUser(session, base_url, {"name": "Alice"})
+    second_create = CreateUser(session, base_url, {"name": "Bob"})
+    follow_up = UpdateUser(session, base_url, 1, {"name": "Alice Updated"})
+    invoker.execute_batch(
+        [first_create, second_create, follow_up],
+        max_workers=4,
+        dependencies={follow_up: [first_create]},
+    )